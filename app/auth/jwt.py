@@ -1,4 +1,4 @@
-from database import get_db
+from database import get_db, get_read_db, is_pinned
 from config import settings
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
@@ -54,6 +54,29 @@ def get_current_user(
 )-> User:
     token = credentials.credentials
     user = get_user_from_token(token, db)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    # Lets a commit on this session pin the user to the primary database
+    db.info["user_id"] = user.id
+    return user
+
+def get_current_reader(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_read_db)
+)-> User:
+    # get_current_user for read-only routes: the lookup (and the route's own
+    # queries on the same session) hit the replica unless the user just wrote
+    payload = verify_access_token(credentials.credentials)
+    user = None
+    if payload is not None and payload.get("sub") is not None:
+        user_id = int(payload["sub"])
+        db.info["user_id"] = user_id
+        db.info["primary"] = is_pinned(user_id)
+        user = db.query(User).filter(User.id == user_id).first()
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, TEXT, DateTime, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, TEXT, Date, DateTime, UniqueConstraint, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from database import Base
 from datetime import datetime
@@ -17,13 +17,22 @@ class User(Base):
 
 class TODO(Base):
     __tablename__ = "Todo"
+    __table_args__ = (Index('ix_todo_user_id_date', 'user_id', 'date'), )
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     user = relationship("User", back_populates="todos")
     notes = Column(TEXT)
     date = Column(DateTime)
     status = Column(String, default='Pending')
     priority = Column(String, default='Medium')
+    # RRULE-style rule; the row is then a series starting at `date` whose
+    # occurrences are expanded per query (recurrence.py)
+    recurrence = Column(String, nullable=True)
+
+    # On Postgres the table is hash-partitioned by user_id (migration 52).
+    # Including it in the ORM identity makes refreshes and by-PK loads
+    # filter on it, so they are pruned to a single partition.
+    __mapper_args__ = {"primary_key": [id, user_id]}
 
 class ChatSession(Base):
     __tablename__ = "chat_sessions"
@@ -33,6 +42,10 @@ class ChatSession(Base):
     user_id = Column(Integer, ForeignKey("users.id"))
     session_uuid = Column(String, index=True)  # Per-user unique via composite constraint
     created_at = Column(DateTime, default=datetime.now)
+    # Retention overrides; NULL falls back to the defaults in config.Settings
+    retention_max_age_days = Column(Integer, nullable=True)
+    retention_max_messages = Column(Integer, nullable=True)
+    summary = Column(TEXT, nullable=True)  # Folded digest of compacted messages
     
     # Relationships
     user = relationship("User", back_populates="chat_sessions")
@@ -42,13 +55,60 @@ class ChatSession(Base):
 
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
+    __table_args__ = (Index('ix_chat_messages_session_id_id', 'session_id', 'id'), )
     
     id = Column(Integer, primary_key=True, index=True)
-    session_id = Column(Integer, ForeignKey("chat_sessions.id"))
+    session_id = Column(Integer, ForeignKey("chat_sessions.id"), nullable=False)
     sender = Column(String)  # 'user' or 'assistant' (not 'ai' - match OpenAI format!)
     message = Column(TEXT)
     timestamp = Column(DateTime, default=datetime.now)
     tool_used = Column(String, nullable=True)
     
+    # Partitioned by session_id on Postgres, see TODO above
+    __mapper_args__ = {"primary_key": [id, session_id]}
+    
     # Relationship
-    session = relationship("ChatSession", back_populates="messages")
\ No newline at end of file
+    session = relationship("ChatSession", back_populates="messages")
+
+
+class ChatMessageArchive(Base):
+    __tablename__ = "chat_message_archives"
+
+    id = Column(Integer, primary_key=True, index=True)
+    session_id = Column(Integer, ForeignKey("chat_sessions.id"), index=True)
+    first_message_id = Column(Integer)
+    last_message_id = Column(Integer)
+    first_timestamp = Column(DateTime)
+    last_timestamp = Column(DateTime)
+    message_count = Column(Integer)
+    raw_bytes = Column(Integer)
+    payload = Column(LargeBinary)  # zlib-compressed JSON list of the archived messages
+    archived_at = Column(DateTime, default=datetime.now)
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    owner = Column(String, primary_key=True)  # user id from the token
+    key = Column(String, primary_key=True)  # the client's Idempotency-Key header
+    request_hash = Column(String, nullable=False)
+    status_code = Column(Integer, nullable=True)  # NULL while the first request is running
+    response_headers = Column(TEXT, nullable=True)  # JSON list of [name, value]
+    response_body = Column(LargeBinary, nullable=True)
+    locked_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+class TodoOccurrence(Base):
+    # Sparse overrides of single occurrences of a recurring TODO (see
+    # recurrence.py); occurrences without a row just follow their series
+    __tablename__ = "todo_occurrences"
+    __table_args__ = (Index('ix_todo_occurrences_user_id_date', 'user_id', 'occurrence_date'), )
+
+    todo_id = Column(Integer, primary_key=True)  # no FK: Todo's key is (id, user_id) once partitioned
+    occurrence_date = Column(Date, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    status = Column(String, nullable=True)  # NULL inherits from the series
+    notes = Column(TEXT, nullable=True)
+    priority = Column(String, nullable=True)
+    skipped = Column(Boolean, default=False, nullable=False)
@@ -1,20 +1,21 @@
 # from app.config import settings
-from .jwt import get_current_user, verify_access_token, hash_password, verify_password, create_access_token
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from .jwt import get_current_user, get_current_reader, verify_access_token, hash_password, verify_password, create_access_token
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Request, Query
 from sqlalchemy.orm import Session
-from database import get_db
+from sqlalchemy import func, case
+from database import get_db, get_read_db, is_pinned, pin_to_primary
 from .schemas import *
 from .models import *
 import json
 from fastapi import Response
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from typing import List
-from datetime import datetime
-import httpx
+from typing import List, Optional
+from datetime import datetime, date, timedelta
 import os
 from config import settings
-
-from mcp_config.server_setup import handle_tool_call
+from http_cache import cached_response, fingerprint
+from write_queue import run_write
+from recurrence import normalize_rule, expand_series, request_window, override_occurrence, delete_overrides
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -34,6 +35,8 @@ def register_user(user: UserCreate, db: Session = Depends(get_db), response_mode
     db.add(new_user)
     db.commit()
     db.refresh(new_user)
+    # The first /auth/me right after signing up must not hit a lagging replica
+    pin_to_primary(new_user.id)
     return new_user
 
 @router.post("/login", response_model=Token)
@@ -49,12 +52,26 @@ def login_user(user_credentials: UserLogin, db: Session = Depends(get_db)):
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/me", response_model=UserResponse, status_code=status.HTTP_200_OK)
-def get_me(current_user: User = Depends(get_current_user)):
-    return current_user
+def get_me(request: Request, current_user: User = Depends(get_current_reader)):
+    version = fingerprint(current_user.id, current_user.email, current_user.username, current_user.is_active)
+    return cached_response(
+        request, ("me", current_user.id), version,
+        lambda: UserResponse.model_validate(current_user)
+    )
 
 @router.get('/user_profile', response_model=UserProfile, status_code=status.HTTP_200_OK)
-def user_profile(current_user: User = Depends(get_current_user)):
-    return current_user
+def user_profile(request: Request, current_user: User = Depends(get_current_reader)):
+    version = fingerprint(current_user.username, current_user.email)
+    return cached_response(
+        request, ("user_profile", current_user.id), version,
+        lambda: UserProfile.model_validate(current_user, from_attributes=True)
+    )
+
+def _checked_rule(text):
+    try:
+        return normalize_rule(text)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid recurrence: {e}")
 
 @router.post('/todo', response_model=TodoResponse, status_code=status.HTTP_201_CREATED)
 def wright_todo(todo_data: CreateTodo, current_user: User = Depends(get_current_user) , db: Session = Depends(get_db)):
@@ -63,6 +80,7 @@ def wright_todo(todo_data: CreateTodo, current_user: User = Depends(get_current_
         date=todo_data.date, 
         status=todo_data.status,
         priority=todo_data.priority,
+        recurrence=_checked_rule(todo_data.recurrence),
         user_id=current_user.id
     )
     db.add(new_todo)
@@ -70,10 +88,119 @@ def wright_todo(todo_data: CreateTodo, current_user: User = Depends(get_current_
     db.refresh(new_todo)
     return new_todo
 
+CALENDAR_MAX_DAYS = 366
+
+@router.get('/todo/calendar', response_model=List[CalendarDay], status_code=status.HTTP_200_OK)
+def todo_calendar(
+    request: Request,
+    date_from: date = Query(..., alias="from"),
+    date_to: date = Query(..., alias="to"),
+    top: int = Query(0, ge=0, le=20, description="Preview the top N todos per day"),
+    current_user: User = Depends(get_current_reader),
+    db: Session = Depends(get_read_db)
+):
+    if date_to < date_from:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+    if (date_to - date_from).days >= CALENDAR_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range is limited to {CALENDAR_MAX_DAYS} days")
+
+    # Range on the raw column so the (user_id, date) index is used.
+    # Recurring todos are expanded separately below.
+    start = datetime.combine(date_from, datetime.min.time())
+    end = datetime.combine(date_to + timedelta(days=1), datetime.min.time())
+    in_range = (TODO.user_id == current_user.id, TODO.date >= start, TODO.date < end, TODO.recurrence.is_(None))
+    day = func.date(TODO.date)
+
+    counts = db.query(day, TODO.status, TODO.priority, func.count(TODO.id)).filter(
+        *in_range
+    ).group_by(day, TODO.status, TODO.priority).all()
+
+    previews = []
+    if top:
+        priority_rank = case((TODO.priority == 'High', 0), (TODO.priority == 'Medium', 1), else_=2)
+        ranked = db.query(
+            TODO.id, TODO.notes, TODO.status, TODO.priority, TODO.date,
+            day.label('day'),
+            func.row_number().over(
+                partition_by=day, order_by=(priority_rank, TODO.date, TODO.id)
+            ).label('rn')
+        ).filter(*in_range).subquery()
+        previews = db.query(ranked).filter(ranked.c.rn <= top).order_by(ranked.c.day, ranked.c.rn).all()
+
+    occurrences = expand_series(db, current_user.id, date_from, date_to + timedelta(days=1))
+
+    def build():
+        days = {}
+        tallies = [(str(day_value), todo_status, priority, count) for day_value, todo_status, priority, count in counts]
+        tallies += [(str(o["occurrence_date"]), o["status"], o["priority"], 1) for o in occurrences]
+        for day_key, todo_status, priority, count in tallies:
+            entry = days.setdefault(day_key, {
+                "date": day_key, "total": 0, "by_status": {}, "by_priority": {}, "preview": []
+            })
+            entry["total"] += count
+            todo_status, priority = todo_status or 'Pending', priority or 'Medium'
+            entry["by_status"][todo_status] = entry["by_status"].get(todo_status, 0) + count
+            entry["by_priority"][priority] = entry["by_priority"].get(priority, 0) + count
+        if top:
+            # Same ranking as the SQL window: priority, then time, then id
+            candidates = [(str(row.day), row._mapping) for row in previews]
+            candidates += [(str(o["occurrence_date"]), o) for o in occurrences]
+            rank = {'High': 0, 'Medium': 1}
+            for day_key, item in sorted(candidates, key=lambda c: (
+                c[0], rank.get(c[1]["priority"], 2), c[1]["date"], c[1]["id"]
+            )):
+                preview = days[day_key]["preview"]
+                if len(preview) < top:
+                    preview.append({
+                        "id": item["id"], "notes": item["notes"], "status": item["status"], "priority": item["priority"]
+                    })
+        return [CalendarDay.model_validate(days[key]) for key in sorted(days)]
+
+    return cached_response(
+        request, ("calendar", current_user.id, date_from, date_to, top),
+        fingerprint(counts, previews, occurrences), build
+    )
+
 @router.get('/todo/{user_id}', response_model=List[TodoResponse], status_code=status.HTTP_200_OK)
-def get_user_todo(user_id: int, db: Session = Depends(get_db)):
-    todo = db.query(TODO).filter(TODO.user_id==user_id).all()
-    return todo
+def get_user_todo(
+    user_id: int,
+    request: Request,
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    db: Session = Depends(get_read_db)
+):
+    db.info["primary"] = is_pinned(user_id)
+    # Plain column tuples: cheap to fingerprint, only turned into JSON on a cache miss
+    query = db.query(
+        TODO.id, TODO.notes, TODO.date, TODO.status, TODO.priority, TODO.user_id
+    ).filter(TODO.user_id==user_id, TODO.recurrence.is_(None))
+
+    # One-off todos are filtered by the bounds given (all of them without any);
+    # recurring ones are expanded over the range, completed from a single
+    # bound, or over the default window around today
+    window_start, window_end = request_window(date_from, date_to)
+    if date_from is not None:
+        query = query.filter(TODO.date >= datetime.combine(date_from, datetime.min.time()))
+    if date_to is not None:
+        query = query.filter(TODO.date < datetime.combine(window_end, datetime.min.time()))
+    if window_end <= window_start:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+    if (window_end - window_start).days > CALENDAR_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range is limited to {CALENDAR_MAX_DAYS} days")
+
+    rows = query.order_by(TODO.id).all()
+    occurrences = expand_series(db, user_id, window_start, window_end)
+
+    def build():
+        todos = [TodoResponse.model_validate(row._mapping) for row in rows]
+        todos += [TodoResponse.model_validate(occurrence) for occurrence in occurrences]
+        todos.sort(key=lambda todo: (todo.id, todo.date))
+        return todos
+
+    return cached_response(
+        request, ("todos", user_id, window_start, window_end, date_from is None),
+        fingerprint(rows, occurrences), build
+    )
 
 @router.patch('/todo/{todo_id}' , status_code=status.HTTP_200_OK)
 def update_user_todo(todo_id: int, todo_data: UpdateTodo, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
@@ -85,13 +212,33 @@ def update_user_todo(todo_id: int, todo_data: UpdateTodo, current_user: User = D
             detail=f"Todo with id {todo_id} not found or you don't have permission"
         )
     update_dict = todo_data.model_dump(exclude_unset=True)
+    occurrence_date = update_dict.pop("occurrence_date", None)
+    if occurrence_date is not None:
+        # A single occurrence of a recurring todo: stored as a sparse override
+        try:
+            override_occurrence(db, todo, occurrence_date, update_dict)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        db.commit()
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+    if "skipped" in update_dict:
+        raise HTTPException(status_code=400, detail="'skipped' needs an 'occurrence_date'")
+    if "recurrence" in update_dict:
+        update_dict["recurrence"] = _checked_rule(update_dict["recurrence"])
+        if update_dict["recurrence"] is None:
+            delete_overrides(db, current_user.id, [todo_id])
     todo_query.update(update_dict, synchronize_session=False)
     db.commit()
     db.refresh(todo)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 @router.delete('/todo/{todo_id}', status_code=status.HTTP_204_NO_CONTENT)
-def delete_user_todo(todo_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def delete_user_todo(
+    todo_id: int,
+    occurrence_date: Optional[date] = Query(None, description="Skip only this occurrence of a recurring todo"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
     todo_query = db.query(TODO).filter(TODO.id == todo_id, TODO.user_id == current_user.id)
     todo = todo_query.first()
     if todo is None:
@@ -99,6 +246,14 @@ def delete_user_todo(todo_id: int, current_user: User = Depends(get_current_user
             status_code=status.HTTP_404_NOT_FOUND, 
             detail=f"Todo with id {todo_id} not found or you don't have permission"
         )
+    if occurrence_date is not None:
+        try:
+            override_occurrence(db, todo, occurrence_date, {"skipped": True})
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        db.commit()
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+    delete_overrides(db, current_user.id, [todo_id])
     todo_query.delete(synchronize_session=False)
     db.commit()
     return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -108,12 +263,19 @@ AI_TOOLS = [
         "type": "function",
         "function": {
             "name": "create_todo",
-            "description": "Create a single new todo item.",
+            "description": "Create a single new todo item, or one repeating todo with a recurrence rule.",
             "parameters": {
                 "type": "object",
                 "properties": {
                     "notes": {"type": "string", "description": "The task content"},
-                    "date": {"type": "string", "description": "ISO date YYYY-MM-DD."},
+                    "date": {"type": "string", "description": "ISO date YYYY-MM-DD. For a repeating todo, the first occurrence."},
+                    "recurrence": {
+                        "type": "string",
+                        "description": (
+                            "Only for repeating todos: RRULE like 'FREQ=DAILY;UNTIL=2027-10-19', "
+                            "'FREQ=WEEKLY;BYDAY=MO,WE;COUNT=10' or 'FREQ=MONTHLY;INTERVAL=2'."
+                        )
+                    },
                     "status": {
                         "type": "string", 
                         "enum": ["Pending", "In Progress", "Completed"],
@@ -133,7 +295,7 @@ AI_TOOLS = [
         "type": "function",
         "function": {
             "name": "bulk_create_todos",
-            "description": "Create multiple todo items at once.",
+            "description": "Create multiple different todo items at once. For one task repeating on a schedule use create_todo with 'recurrence' instead.",
             "parameters": {
                 "type": "object",
                 "properties": {
@@ -174,11 +336,14 @@ AI_TOOLS = [
         "type": "function",
         "function": {
             "name": "edit_todo",
-            "description": "Update an existing todo's details by its ID.",
+            "description": "Update an existing todo's details by its ID. For a repeating todo pass 'occurrence_date' to change only that occurrence.",
             "parameters": {
                 "type": "object",
                 "properties": {
                     "todo_id": {"type": "integer", "description": "The ID of the todo to update"},
+                    "occurrence_date": {"type": "string", "description": "YYYY-MM-DD of one occurrence of a repeating todo"},
+                    "skipped": {"type": "boolean", "description": "With occurrence_date: skip that occurrence"},
+                    "recurrence": {"type": "string", "description": "New RRULE for a repeating todo, empty to stop repeating"},
                     "notes": {"type": "string"},
                     "date": {"type": "string", "description": "YYYY-MM-DD"},
                     "status": {"type": "string", "enum": ["Pending", "In Progress", "Completed", "Cancelled"]},
@@ -208,6 +373,30 @@ AI_TOOLS = [
 ]
 
 
+@chat_router.patch("/chat/sessions/{session_uuid}", status_code=status.HTTP_204_NO_CONTENT)
+def update_chat_session(
+    session_uuid: str,
+    session_data: UpdateChatSession,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    # Per-session retention overrides read by chat_retention
+    session_query = db.query(ChatSession).filter(
+        ChatSession.session_uuid == session_uuid,
+        ChatSession.user_id == current_user.id
+    )
+    if session_query.first() is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Chat session {session_uuid} not found"
+        )
+    update_dict = session_data.model_dump(exclude_unset=True)
+    if update_dict:
+        session_query.update(update_dict, synchronize_session=False)
+        db.commit()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
 @chat_router.post("/chat")
 async def chat_with_agent(
     message: str = Body(..., embed=True),
@@ -215,6 +404,11 @@ async def chat_with_agent(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)  # Add database dependency
 ):
+    # Heavy imports (mcp server stack, httpx) are deferred to the first chat
+    # request to keep application startup fast
+    import httpx
+    from mcp_config.server_setup import handle_tool_call
+
     try:
         today_str = datetime.now().strftime("%Y-%m-%d")
         today_day = datetime.now().strftime("%A") 
@@ -267,11 +461,19 @@ async def chat_with_agent(
                     "4. RESPONSE FORMAT: If your final step is reporting 'get_todos' results, "
                     "output ONLY a raw JSON array. No conversational text."
                     "5. AGENTIC FLOW: You are allowed to call multiple tools in sequence to fulfill a request."
-                    "6. In case of complex query use step by step reasoning before answering using all of tools you have. In case of if you do not have any information about any todo user is asking use tools to get all todos and then use it you do not have to inform or confirm from user for this one."
+                    "6. REPEATING TASKS: for a task that repeats (daily standup, weekly review) call create_todo once with 'recurrence', never create one todo per day. "
+                    "7. In case of complex query use step by step reasoning before answering using all of tools you have. In case of if you do not have any information about any todo user is asking use tools to get all todos and then use it you do not have to inform or confirm from user for this one."
                 )
             }
         ]
         
+        # Older turns were compacted into a running summary
+        if chat_session.summary:
+            messages.append({
+                "role": "system",
+                "content": f"Summary of earlier conversation in this session:\n{chat_session.summary}"
+            })
+        
         # Add previous conversation history
         for msg in previous_messages:
             messages.append({
@@ -282,15 +484,16 @@ async def chat_with_agent(
         # Add current user message
         messages.append({"role": "user", "content": message})
         
-        # 4️⃣ SAVE USER MESSAGE TO DB
+        # 4️⃣ SAVE USER MESSAGE TO DB (group-committed in SQLite mode)
+        chat_session_id = chat_session.id
+        db.commit()  # hand the connection back before the model round trips
         user_message = ChatMessage(
-            session_id=chat_session.id,
+            session_id=chat_session_id,
             sender="user",
             message=message,
             timestamp=datetime.now()
         )
-        db.add(user_message)
-        db.commit()
+        await run_write(lambda session: session.add(user_message), current_user.id)
         
         
         async with httpx.AsyncClient() as client:
@@ -313,7 +516,11 @@ async def chat_with_agent(
                 result = response.json()
                 
                 if 'choices' not in result:
-                    return {"answer": f"API Error: {result.get('error', 'Unknown error')}"}
+                    # An error status, so a retry with the same Idempotency-Key runs again
+                    raise HTTPException(
+                        status_code=status.HTTP_502_BAD_GATEWAY,
+                        detail=f"API Error: {result.get('error', 'Unknown error')}"
+                    )
                     
                 ai_message = result['choices'][0]['message']
                 messages.append(ai_message)
@@ -344,14 +551,13 @@ async def chat_with_agent(
             
             # 5️⃣ SAVE ASSISTANT MESSAGE TO DB
             assistant_message = ChatMessage(
-                session_id=chat_session.id,
+                session_id=chat_session_id,
                 sender="assistant",
                 message=ai_final_text,
                 timestamp=datetime.now(),
                 tool_used=", ".join(tools_used) if tools_used else None
             )
-            db.add(assistant_message)
-            db.commit()
+            await run_write(lambda session: session.add(assistant_message), current_user.id)
             
             # Parse response format
             if ai_final_text:
@@ -378,7 +584,9 @@ async def chat_with_agent(
                 "answer": ai_final_text,
                 "session_uuid": session_uuid
             }
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         traceback.print_exc()
-        return
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail="The assistant could not answer, please retry")
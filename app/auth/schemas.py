@@ -1,6 +1,7 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional
-from datetime import datetime
+from pydantic import BaseModel, EmailStr, Field
+from typing import Optional, Dict, List
+from datetime import datetime, date
+from datetime import date as Date  # for models that also have a `date` field
 
 class UserCreate(BaseModel):
     email: EmailStr
@@ -35,6 +36,7 @@ class CreateTodo(BaseModel):
     date: datetime
     status: str
     priority: str
+    recurrence: Optional[str] = None  # e.g. FREQ=DAILY;UNTIL=2027-10-19, `date` is the first occurrence
 
 class TodoResponse(BaseModel):
     id: int
@@ -43,6 +45,8 @@ class TodoResponse(BaseModel):
     status: str
     priority: str
     user_id: int
+    recurrence: Optional[str] = None
+    occurrence_date: Optional[Date] = None  # set on expanded occurrences of a recurring todo
     
     class Config:
         from_attributes = True
@@ -52,4 +56,25 @@ class UpdateTodo(BaseModel):
     date: Optional[datetime] = None
     status: Optional[str] = None
     priority: Optional[str] = None
-    
+    recurrence: Optional[str] = None
+    # With occurrence_date only that occurrence of a recurring todo changes
+    occurrence_date: Optional[Date] = None
+    skipped: Optional[bool] = None
+
+class UpdateChatSession(BaseModel):
+    # null falls back to the server default, 0 turns that limit off
+    retention_max_age_days: Optional[int] = Field(None, ge=0)
+    retention_max_messages: Optional[int] = Field(None, ge=0)
+
+class CalendarPreview(BaseModel):
+    id: int
+    notes: Optional[str] = None
+    status: Optional[str] = None
+    priority: Optional[str] = None
+
+class CalendarDay(BaseModel):
+    date: date
+    total: int
+    by_status: Dict[str, int]
+    by_priority: Dict[str, int]
+    preview: List[CalendarPreview] = []
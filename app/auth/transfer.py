@@ -0,0 +1,391 @@
+import codecs
+import csv
+import heapq
+import io
+import json
+import zlib
+from datetime import date, datetime
+from itertools import islice
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional
+
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import insert
+from starlette.concurrency import run_in_threadpool
+
+from bulk_load import bulk_insert
+from database import SessionLocal, ReadSessionLocal, is_pinned
+from recurrence import normalize_rule
+from .jwt import get_current_user, get_current_reader
+from .models import User, TODO, TodoOccurrence, ChatSession, ChatMessage, ChatMessageArchive
+
+transfer_router = APIRouter(prefix="/auth", tags=["export"])
+
+EXPORT_BATCH_SIZE = 1000
+IMPORT_BATCH_SIZE = 1000
+MAX_ERROR_SAMPLES = 20
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+FORMAT_PATTERN = "^(ndjson|csv)$"
+
+# `occurrences` lists a recurring todo's per-occurrence overrides (JSON in CSV)
+TODO_FIELDS = ["id", "notes", "date", "status", "priority", "recurrence", "occurrences"]
+CHAT_FIELDS = ["session_uuid", "sender", "message", "timestamp", "tool_used"]
+
+
+# ---------- export ----------
+
+def _serialize(rows: Iterable, fields: List[str], fmt: str):
+    """Yield the export body in chunks of EXPORT_BATCH_SIZE rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == "csv" else None
+    if writer:
+        writer.writerow(fields)
+
+    count = 0
+    for row in rows:
+        values = [value.isoformat() if isinstance(value, datetime) else value for value in row]
+        if writer:
+            values = [json.dumps(value) if isinstance(value, list) else value for value in values]
+            writer.writerow(values)
+        else:
+            buffer.write(json.dumps(dict(zip(fields, values))))
+            buffer.write("\n")
+        count += 1
+        if count % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _stream_query(build_query: Callable, fields: List[str], fmt: str, user_id: int,
+                  decorate: Optional[Callable] = None):
+    # The session lives as long as the response body, not the request handler.
+    # yield_per turns on stream_results, i.e. a server-side cursor on Postgres.
+    db = ReadSessionLocal(info={"primary": is_pinned(user_id)})
+    try:
+        rows = build_query(db).yield_per(EXPORT_BATCH_SIZE)
+        if decorate is not None:
+            rows = decorate(db, rows)
+        yield from _serialize(rows, fields, fmt)
+    finally:
+        db.close()
+
+
+def _export_response(body, name: str, fmt: str) -> StreamingResponse:
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt}"'}
+    )
+
+
+@transfer_router.get("/export/todos")
+def export_todos(
+    fmt: str = Query("ndjson", alias="format", pattern=FORMAT_PATTERN),
+    current_user: User = Depends(get_current_reader)
+):
+    user_id = current_user.id
+
+    def build_query(db):
+        return db.query(
+            TODO.id, TODO.notes, TODO.date, TODO.status, TODO.priority, TODO.recurrence
+        ).filter(TODO.user_id == user_id).order_by(TODO.id)
+
+    def with_occurrences(db, rows):
+        # One override lookup per batch, for the recurring todos in it
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, EXPORT_BATCH_SIZE))
+            if not batch:
+                return
+            overrides = {}
+            series_ids = [row.id for row in batch if row.recurrence]
+            if series_ids:
+                for override in db.query(TodoOccurrence).filter(
+                    TodoOccurrence.user_id == user_id, TodoOccurrence.todo_id.in_(series_ids)
+                ).order_by(TodoOccurrence.todo_id, TodoOccurrence.occurrence_date):
+                    overrides.setdefault(override.todo_id, []).append({
+                        "occurrence_date": override.occurrence_date.isoformat(),
+                        "status": override.status,
+                        "notes": override.notes,
+                        "priority": override.priority,
+                        "skipped": override.skipped,
+                    })
+            for row in batch:
+                yield tuple(row) + (overrides.get(row.id) if row.recurrence else None,)
+
+    return _export_response(
+        _stream_query(build_query, TODO_FIELDS, fmt, user_id, with_occurrences), "todos", fmt
+    )
+
+
+@transfer_router.get("/export/chat")
+def export_chat(
+    fmt: str = Query("ndjson", alias="format", pattern=FORMAT_PATTERN),
+    current_user: User = Depends(get_current_reader)
+):
+    user_id = current_user.id
+
+    def build_query(db):
+        return db.query(
+            ChatSession.id, ChatMessage.id, ChatSession.session_uuid, ChatMessage.sender,
+            ChatMessage.message, ChatMessage.timestamp, ChatMessage.tool_used
+        ).join(ChatSession, ChatMessage.session_id == ChatSession.id).filter(
+            ChatSession.user_id == user_id
+        ).order_by(ChatSession.id, ChatMessage.id)
+
+    def with_archives(db, rows):
+        # Messages compacted by chat_retention live in zlib blobs; merge them
+        # back in message id order so the export has the full history
+        archives = db.query(
+            ChatSession.id, ChatSession.session_uuid, ChatMessageArchive.payload
+        ).join(ChatSession, ChatMessageArchive.session_id == ChatSession.id).filter(
+            ChatSession.user_id == user_id
+        ).order_by(ChatSession.id, ChatMessageArchive.first_message_id).yield_per(EXPORT_BATCH_SIZE)
+
+        def archived():
+            for session_id, session_uuid, payload in archives:
+                for m in json.loads(zlib.decompress(payload)):
+                    yield (session_id, m["id"], session_uuid, m["sender"], m["message"],
+                           m["timestamp"], m["tool_used"])
+
+        for row in heapq.merge(archived(), rows, key=lambda row: (row[0], row[1])):
+            yield tuple(row)[2:]
+
+    return _export_response(
+        _stream_query(build_query, CHAT_FIELDS, fmt, user_id, with_archives), "chat_history", fmt
+    )
+
+
+# ---------- import ----------
+
+async def _iter_lines(request: Request) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    async for chunk in request.stream():
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def _iter_records(request: Request, fmt: str) -> AsyncIterator[str]:
+    """Yield one raw record per NDJSON line or CSV row.
+
+    A CSV row is only complete once its quotes are balanced, so quoted
+    fields containing newlines are kept together.
+    """
+    pending = None
+    async for line in _iter_lines(request):
+        if fmt == "csv":
+            pending = line if pending is None else pending + "\n" + line
+            if pending.count('"') % 2:
+                continue
+            line, pending = pending, None
+        if line.strip():
+            yield line
+    if pending is not None:
+        yield pending
+
+
+def _parse_datetime(value) -> datetime:
+    if not value:
+        raise ValueError("missing date")
+    return datetime.fromisoformat(value)
+
+
+def _occurrence_rows(value) -> List[Dict]:
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = json.loads(value)
+    if not isinstance(value, list) or not all(isinstance(item, dict) for item in value):
+        raise ValueError("'occurrences' must be a list of objects")
+    return [{
+        "occurrence_date": date.fromisoformat(item.get("occurrence_date") or ""),
+        "status": item.get("status"),
+        "notes": item.get("notes"),
+        "priority": item.get("priority"),
+        "skipped": bool(item.get("skipped")),
+    } for item in value]
+
+
+def _todo_row(record: Dict, user_id: int) -> Dict:
+    if not record.get("notes"):
+        raise ValueError("'notes' is required")
+    recurrence = normalize_rule(record.get("recurrence"))
+    occurrences = _occurrence_rows(record.get("occurrences"))
+    if occurrences and recurrence is None:
+        raise ValueError("'occurrences' needs a 'recurrence'")
+    return {
+        "user_id": user_id,
+        "notes": record["notes"],
+        "date": _parse_datetime(record.get("date")),
+        "status": record.get("status") or "Pending",
+        "priority": record.get("priority") or "Medium",
+        "recurrence": recurrence,
+        "occurrences": occurrences,
+    }
+
+
+def _chat_row(record: Dict) -> Dict:
+    if not record.get("session_uuid"):
+        raise ValueError("'session_uuid' is required")
+    if record.get("sender") not in ("user", "assistant"):
+        raise ValueError("'sender' must be 'user' or 'assistant'")
+    return {
+        "session_uuid": record["session_uuid"],
+        "sender": record["sender"],
+        "message": record.get("message") or "",
+        "timestamp": _parse_datetime(record.get("timestamp")),
+        "tool_used": record.get("tool_used") or None,
+    }
+
+
+def _write_todos(rows: List[Dict]) -> None:
+    db = SessionLocal(info={"user_id": rows[0]["user_id"]})
+    try:
+        plain, overrides = [], []
+        for row in rows:
+            row = dict(row)
+            occurrences = row.pop("occurrences")
+            if not occurrences:
+                plain.append(row)
+                continue
+            # Its overrides need the new id, so a series with overrides is inserted on its own
+            todo_id = db.execute(insert(TODO.__table__).values(**row).returning(TODO.__table__.c.id)).scalar_one()
+            overrides += [dict(occurrence, todo_id=todo_id, user_id=row["user_id"]) for occurrence in occurrences]
+        bulk_insert(db, TODO.__table__, plain)
+        bulk_insert(db, TodoOccurrence.__table__, overrides)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _write_chat(user_id: int, rows: List[Dict], session_ids: Dict[str, int]) -> None:
+    db = SessionLocal(info={"user_id": user_id})
+    missing = {row["session_uuid"] for row in rows} - session_ids.keys()
+    try:
+        if missing:
+            session_ids.update(db.query(ChatSession.session_uuid, ChatSession.id).filter(
+                ChatSession.user_id == user_id, ChatSession.session_uuid.in_(missing)
+            ).all())
+            for session_uuid in missing - session_ids.keys():
+                chat_session = ChatSession(user_id=user_id, session_uuid=session_uuid, created_at=datetime.now())
+                db.add(chat_session)
+                db.flush()
+                session_ids[session_uuid] = chat_session.id
+
+        messages = []
+        for row in rows:
+            message = dict(row, session_id=session_ids[row["session_uuid"]])
+            del message["session_uuid"]
+            messages.append(message)
+        bulk_insert(db, ChatMessage.__table__, messages)
+        db.commit()
+    except Exception:
+        db.rollback()
+        # Sessions created in the failed transaction are gone again
+        for session_uuid in missing:
+            session_ids.pop(session_uuid, None)
+        raise
+    finally:
+        db.close()
+
+
+class _ImportProgressResponse(StreamingResponse):
+    """Streams progress while the request body is still being read, so it must
+    not run StreamingResponse's disconnect listener, which would compete with
+    the handler for receive() messages on older ASGI servers."""
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+def _progress(**payload) -> str:
+    return json.dumps(payload) + "\n"
+
+
+async def _run_import(request: Request, fmt: str, to_row: Callable, write: Callable) -> AsyncIterator[str]:
+    """Parse the request body in chunks and write it in batches, streaming one
+    NDJSON progress line per committed batch."""
+    imported = errors = batches = 0
+    error_samples = []
+    batch = []
+    header = None
+    record_no = 0
+
+    async def flush():
+        nonlocal imported, batches, batch
+        rows, batch = batch, []
+        await run_in_threadpool(write, rows)
+        imported += len(rows)
+        batches += 1
+        return _progress(batch=batches, rows=len(rows), imported=imported, errors=errors)
+
+    try:
+        async for raw in _iter_records(request, fmt):
+            if fmt == "csv" and header is None:
+                header = next(csv.reader([raw]))
+                continue
+            record_no += 1
+            try:
+                if fmt == "csv":
+                    record = dict(zip(header, next(csv.reader([raw]))))
+                else:
+                    record = json.loads(raw)
+                    if not isinstance(record, dict):
+                        raise ValueError("expected a JSON object")
+                batch.append(to_row(record))
+            except (ValueError, TypeError, csv.Error) as e:
+                errors += 1
+                if len(error_samples) < MAX_ERROR_SAMPLES:
+                    error_samples.append({"record": record_no, "error": str(e)})
+                continue
+
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                yield await flush()
+
+        if batch:
+            yield await flush()
+    except Exception as e:
+        yield _progress(done=False, imported=imported, errors=errors, error_samples=error_samples, detail=str(e))
+        return
+
+    yield _progress(done=True, imported=imported, errors=errors, error_samples=error_samples)
+
+
+@transfer_router.post("/import/todos")
+async def import_todos(
+    request: Request,
+    fmt: str = Query("ndjson", alias="format", pattern=FORMAT_PATTERN),
+    current_user: User = Depends(get_current_user)
+):
+    user_id = current_user.id
+    return _ImportProgressResponse(
+        _run_import(request, fmt, lambda record: _todo_row(record, user_id), _write_todos),
+        media_type=MEDIA_TYPES["ndjson"]
+    )
+
+
+@transfer_router.post("/import/chat")
+async def import_chat(
+    request: Request,
+    fmt: str = Query("ndjson", alias="format", pattern=FORMAT_PATTERN),
+    current_user: User = Depends(get_current_user)
+):
+    user_id = current_user.id
+    session_ids = {}
+    return _ImportProgressResponse(
+        _run_import(request, fmt, _chat_row, lambda rows: _write_chat(user_id, rows, session_ids)),
+        media_type=MEDIA_TYPES["ndjson"]
+    )
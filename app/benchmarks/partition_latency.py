@@ -0,0 +1,143 @@
+"""Per-user query latency for the Todo and chat_messages access paths.
+
+Run it before and after the partitioning migration (52) and compare:
+
+    python -m benchmarks.partition_latency --label before --out before.json
+    alembic upgrade head
+    python -m benchmarks.partition_latency --label after --compare before.json
+
+The queries mirror what router.py and handle_tool_call run, all scoped by
+user_id or session_id. On Postgres the plan of each query is also checked
+for how many partitions it touches (1 when pruning works).
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select, text
+
+from auth.models import TODO, ChatMessage
+from database import engine
+
+
+def _queries(user_id: int, todo_id: int, session_id: int, today: datetime):
+    return {
+        "todo_list": select(
+            TODO.id, TODO.notes, TODO.date, TODO.status, TODO.priority
+        ).where(TODO.user_id == user_id).order_by(TODO.id),
+        "todo_calendar_month": select(
+            func.date(TODO.date), TODO.status, TODO.priority, func.count(TODO.id)
+        ).where(
+            TODO.user_id == user_id, TODO.date >= today, TODO.date < today + timedelta(days=31)
+        ).group_by(func.date(TODO.date), TODO.status, TODO.priority),
+        "get_todos_pending": select(TODO.id, TODO.notes).where(
+            TODO.user_id == user_id, TODO.status == "Pending"
+        ),
+        "todo_by_id": select(TODO.notes).where(TODO.user_id == user_id, TODO.id == todo_id),
+        "chat_history": select(ChatMessage.sender, ChatMessage.message).where(
+            ChatMessage.session_id == session_id
+        ).order_by(ChatMessage.id.desc()).limit(10),
+    }
+
+
+def _sample(connection, column, count_column, heavy: int, sampled: int, rng: random.Random):
+    """The heaviest owners plus a random sample of the rest."""
+    top = [row[0] for row in connection.execute(
+        select(column).group_by(column).order_by(func.count(count_column).desc()).limit(heavy)
+    )]
+    everyone = [row[0] for row in connection.execute(select(column).distinct())]
+    return top + rng.sample(everyone, min(sampled, len(everyone)))
+
+
+def _todo_ids(connection, users, rng: random.Random):
+    """One existing todo id per user, for the by-id lookup."""
+    return [
+        rng.choice(connection.execute(select(TODO.id).where(TODO.user_id == user_id).order_by(TODO.id)).scalars().all())
+        for user_id in users
+    ]
+
+
+def _partitions_scanned(connection, statement) -> int:
+    sql = str(statement.compile(connection, compile_kwargs={"literal_binds": True}))
+    plan = connection.execute(text("EXPLAIN (FORMAT JSON) " + sql)).scalar()
+    relations = set()
+
+    def walk(node):
+        if "Relation Name" in node:
+            relations.add(node["Relation Name"])
+        for child in node.get("Plans", []):
+            walk(child)
+
+    walk(plan[0]["Plan"])
+    return len(relations)
+
+
+def run(label: str, repeat: int, heavy: int, sampled: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    today = datetime(*datetime.now().timetuple()[:3])
+    results = {"label": label, "dialect": engine.dialect.name, "queries": {}}
+    with engine.connect() as connection:
+        users = _sample(connection, TODO.user_id, TODO.id, heavy, sampled, rng)
+        sessions = _sample(connection, ChatMessage.session_id, ChatMessage.id, heavy, sampled, rng)
+        cases = list(zip(users, _todo_ids(connection, users, rng), sessions))
+        if not cases:
+            raise SystemExit("no todos / chat messages to benchmark, load data with seed.py first")
+
+        timings = {}
+        for user_id, todo_id, session_id in cases:
+            for name, statement in _queries(user_id, todo_id, session_id, today).items():
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    connection.execute(statement).fetchall()
+                    timings.setdefault(name, []).append((time.perf_counter() - started) * 1000)
+
+        for name, samples in timings.items():
+            samples.sort()
+            entry = {
+                "p50_ms": statistics.median(samples),
+                "p95_ms": samples[int(len(samples) * 0.95) - 1],
+                "mean_ms": statistics.fmean(samples),
+            }
+            if engine.dialect.name == "postgresql":
+                entry["relations_scanned"] = _partitions_scanned(
+                    connection, _queries(*cases[0], today)[name]
+                )
+            results["queries"][name] = entry
+    return results
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--label", default="run")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--heavy", type=int, default=5, help="heaviest users/sessions to include")
+    parser.add_argument("--sample", type=int, default=20, help="random users/sessions to include")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", help="write results as JSON")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare with")
+    args = parser.parse_args(argv)
+
+    results = run(args.label, args.repeat, args.heavy, args.sample, args.seed)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    print(f"{'query':<22}{'p50 ms':>10}{'p95 ms':>10}{'relations':>11}" + (f"{'p50 vs ' + baseline['label']:>18}" if baseline else ""))
+    for name, entry in results["queries"].items():
+        line = f"{name:<22}{entry['p50_ms']:>10.3f}{entry['p95_ms']:>10.3f}{entry.get('relations_scanned', '-'):>11}"
+        if baseline and name in baseline["queries"]:
+            before = baseline["queries"][name]["p50_ms"]
+            line += f"{(entry['p50_ms'] - before) / before * 100:>+17.1f}%"
+        print(line)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""Concurrent read/write throughput on SQLite, default engine vs SQLite mode.
+
+Reader threads poll a user's todo list (the GET /auth/todo/{user_id} query)
+while writer threads append chat messages one at a time, for a fixed
+duration against a fresh database file:
+
+    python -m benchmarks.sqlite_concurrency --readers 16 --writers 8 --seconds 10
+
+"default" is a plain create_engine() with rollback journal and one
+transaction per write; "tuned" is database.py's SQLite mode (WAL, pragmas,
+read pool) with writes going through write_queue.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy.exc import OperationalError
+
+
+def _setup(engine, users: int, todos_per_user: int) -> None:
+    from database import Base
+    from auth.models import User, TODO, ChatSession
+    from sqlalchemy.orm import Session
+
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as db:
+        for n in range(1, users + 1):
+            db.add(User(id=n, email=f"bench{n}@example.com", username=f"bench{n}", hashed_password="x"))
+            db.add(ChatSession(id=n, user_id=n, session_uuid=f"bench-{n}", created_at=datetime.now()))
+        db.flush()
+        now = datetime.now()
+        db.add_all([
+            TODO(user_id=n, notes=f"todo {i}", date=now, status="Pending", priority="Medium")
+            for n in range(1, users + 1) for i in range(todos_per_user)
+        ])
+        db.commit()
+
+
+class _Counters:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reads = 0
+        self.writes = 0
+        self.errors = 0
+        self.write_ms = []
+
+    def add(self, field: str, latency_ms: float = None) -> None:
+        with self.lock:
+            setattr(self, field, getattr(self, field) + 1)
+            if latency_ms is not None:
+                self.write_ms.append(latency_ms)
+
+
+def _run(read, write, readers: int, writers: int, seconds: float, users: int) -> dict:
+    from auth.models import ChatMessage
+
+    counters = _Counters()
+    stop = time.monotonic() + seconds
+
+    def reader(seed):
+        rng = random.Random(seed)
+        while time.monotonic() < stop:
+            try:
+                read(rng.randint(1, users))
+                counters.add("reads")
+            except OperationalError:
+                counters.add("errors")
+
+    def writer(seed):
+        rng = random.Random(seed)
+        while time.monotonic() < stop:
+            message = ChatMessage(
+                session_id=rng.randint(1, users), sender="user", message="x" * rng.randint(20, 400),
+                timestamp=datetime.now()
+            )
+            started = time.perf_counter()
+            try:
+                write(message)
+                counters.add("writes", (time.perf_counter() - started) * 1000)
+            except OperationalError:
+                counters.add("errors")
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads += [threading.Thread(target=writer, args=(1000 + i,)) for i in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    latencies = sorted(counters.write_ms) or [0.0]
+    return {
+        "reads_per_s": counters.reads / seconds,
+        "writes_per_s": counters.writes / seconds,
+        "errors": counters.errors,
+        "write_p50_ms": statistics.median(latencies),
+        "write_p95_ms": latencies[int(len(latencies) * 0.95) - 1] if len(latencies) > 1 else latencies[0],
+    }
+
+
+def _list_todos(db, user_id: int):
+    from auth.models import TODO
+
+    return db.query(TODO.id, TODO.notes, TODO.date, TODO.status, TODO.priority).filter(
+        TODO.user_id == user_id
+    ).order_by(TODO.id).all()
+
+
+def bench_default(path: str, args) -> dict:
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    engine = create_engine(f"sqlite:///{path}")
+    _setup(engine, args.users, args.todos)
+    Session = sessionmaker(bind=engine)
+
+    def read(user_id):
+        with Session() as db:
+            _list_todos(db, user_id)
+
+    def write(message):
+        with Session() as db:
+            db.add(message)
+            db.commit()
+
+    try:
+        return _run(read, write, args.readers, args.writers, args.seconds, args.users)
+    finally:
+        engine.dispose()
+
+
+def bench_tuned(path: str, args) -> dict:
+    from database import engine, replica_engine, ReadSessionLocal, sqlite_mode
+    from write_queue import write_queue
+
+    if not sqlite_mode or engine.url.database != path:
+        raise SystemExit("database.py was imported before DATABASE_URL pointed at the benchmark file")
+    _setup(engine, args.users, args.todos)
+
+    def read(user_id):
+        with ReadSessionLocal() as db:
+            _list_todos(db, user_id)
+
+    def write(message):
+        write_queue.submit(lambda session: session.add(message)).result()
+
+    try:
+        return _run(read, write, args.readers, args.writers, args.seconds, args.users)
+    finally:
+        replica_engine.dispose()
+        engine.dispose()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--todos", type=int, default=50, help="todos per user")
+    parser.add_argument("--mode", choices=["both", "default", "tuned"], default="both")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        # database.py picks SQLite mode from the URL at import time
+        tuned_path = os.path.join(directory, "tuned.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{tuned_path}"
+        results = {}
+        if args.mode in ("both", "default"):
+            results["default"] = bench_default(os.path.join(directory, "default.db"), args)
+        if args.mode in ("both", "tuned"):
+            results["tuned"] = bench_tuned(tuned_path, args)
+
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds:g}s")
+    print(f"{'mode':<10}{'reads/s':>10}{'writes/s':>10}{'errors':>8}{'write p50':>11}{'write p95':>11}")
+    for mode, r in results.items():
+        print(
+            f"{mode:<10}{r['reads_per_s']:>10.0f}{r['writes_per_s']:>10.0f}{r['errors']:>8}"
+            f"{r['write_p50_ms']:>9.1f}ms{r['write_p95_ms']:>9.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
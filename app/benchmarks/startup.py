@@ -0,0 +1,102 @@
+"""Measure cold import and startup time of the API and enforce a budget.
+
+Each run is a fresh interpreter, so the numbers match a worker boot:
+
+    python -m benchmarks.startup --runs 5 --budget-ms 1500
+
+Fails (exit code 1) when the median import + lifespan startup exceeds the
+budget, or when importing `main` pulls in a deferred heavy module.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+# Modules that must only be imported on first use, never at startup
+DEFERRED_MODULES = ("mcp", "httpx")
+
+PROBE = f"""
+import json, sys, time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+heavy = sorted(m for m in {DEFERRED_MODULES!r} if m in sys.modules)
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    t2 = time.perf_counter()
+    status = client.get('/healthz').status_code
+    t3 = time.perf_counter()
+print(json.dumps({{
+    'import_ms': (t1 - t0) * 1000,
+    'startup_ms': (t2 - t1) * 1000,
+    'first_request_ms': (t3 - t2) * 1000,
+    'healthz': status,
+    'heavy_imports': heavy,
+}}))
+"""
+
+
+def run_probe() -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=APP_DIR, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(limit: int):
+    """Direct imports of `main` by cumulative import time, from `python -X importtime`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=APP_DIR, capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # Keep the direct imports of `main` (one level of indentation);
+        # deeper ones are already counted in their parent
+        if len(name) - len(name.lstrip()) != 3:
+            continue
+        rows.append((int(cumulative_us), int(self_us), name.strip()))
+    return sorted(rows, reverse=True)[:limit]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1500.0,
+                        help="max median of import + lifespan startup time")
+    parser.add_argument("--top", type=int, default=10, help="show the N slowest top-level imports")
+    args = parser.parse_args(argv)
+
+    samples = [run_probe() for _ in range(args.runs)]
+    import_ms = statistics.median(s["import_ms"] for s in samples)
+    startup_ms = statistics.median(s["startup_ms"] for s in samples)
+    first_request_ms = statistics.median(s["first_request_ms"] for s in samples)
+    heavy = sorted({m for s in samples for m in s["heavy_imports"]})
+
+    print(f"import main:        {import_ms:8.1f} ms (median of {args.runs})")
+    print(f"lifespan startup:   {startup_ms:8.1f} ms")
+    print(f"first /healthz:     {first_request_ms:8.1f} ms")
+    print(f"budget:             {args.budget_ms:8.1f} ms")
+    print("slowest imports of main (cumulative ms):")
+    for cumulative_us, _, name in slowest_imports(args.top):
+        print(f"  {cumulative_us / 1000:8.1f}  {name.strip()}")
+
+    failed = False
+    if heavy:
+        print(f"FAIL: deferred modules imported at startup: {', '.join(heavy)}")
+        failed = True
+    if import_ms + startup_ms > args.budget_ms:
+        print(f"FAIL: startup {import_ms + startup_ms:.1f} ms exceeds budget {args.budget_ms:.1f} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+import csv
+import io
+from typing import Dict, List, Sequence, Tuple
+
+from sqlalchemy import Table
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+
+def supports_copy(connection: Connection) -> bool:
+    dialect = connection.dialect
+    return dialect.name == "postgresql" and dialect.driver == "psycopg2"
+
+
+def bulk_insert(db: Session, table: Table, rows: List[Dict]) -> int:
+    """Insert many rows in one round trip inside the session's transaction.
+
+    Every row must have the same keys. See `insert_tuples` for how the rows
+    are sent to the database.
+    """
+    if not rows:
+        return 0
+    columns = list(rows[0])
+    return insert_tuples(db.connection(), table, columns, [tuple(row[column] for column in columns) for row in rows])
+
+
+def insert_tuples(connection: Connection, table: Table, columns: Sequence[str], rows: List[Tuple]) -> int:
+    """Insert positional rows using the fastest path the driver offers.
+
+    COPY ... FROM STDIN on Postgres (psycopg2), a raw DBAPI executemany on
+    SQLite, and a Core multi-row insert everywhere else.
+    """
+    if not rows:
+        return 0
+
+    if supports_copy(connection):
+        _copy(connection, table, columns, rows)
+    elif connection.dialect.name == "sqlite":
+        _sqlite_executemany(connection, table, columns, rows)
+    else:
+        connection.execute(table.insert(), [dict(zip(columns, row)) for row in rows])
+    return len(rows)
+
+
+def _copy(connection: Connection, table: Table, columns: Sequence[str], rows: List[Tuple]) -> None:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(["\\N" if value is None else value for value in row])
+    buffer.seek(0)
+
+    preparer = connection.dialect.identifier_preparer
+    column_list = ", ".join(preparer.quote(column) for column in columns)
+    sql = f"COPY {preparer.format_table(table)} ({column_list}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert(sql, buffer)
+    finally:
+        cursor.close()
+
+
+def _sqlite_executemany(connection: Connection, table: Table, columns: Sequence[str], rows: List[Tuple]) -> None:
+    # Bypass Core parameter handling, but still store values (e.g. DateTime)
+    # in the format SQLAlchemy reads back.
+    dialect = connection.dialect
+    processors = [table.c[column].type.bind_processor(dialect) for column in columns]
+    if any(processors):
+        rows = [
+            tuple(value if proc is None or value is None else proc(value) for proc, value in zip(processors, row))
+            for row in rows
+        ]
+
+    preparer = dialect.identifier_preparer
+    column_list = ", ".join(preparer.quote(column) for column in columns)
+    placeholders = ", ".join("?" for _ in columns)
+    connection.exec_driver_sql(
+        f"INSERT INTO {preparer.format_table(table)} ({column_list}) VALUES ({placeholders})", rows
+    )
@@ -0,0 +1,215 @@
+"""Chat history retention and compaction.
+
+Messages older than a session's maximum age, or beyond its newest N
+messages, are folded into `ChatSession.summary` and moved to
+`chat_message_archives` as zlib-compressed blobs, one short transaction
+per batch:
+
+    python chat_retention.py --dry-run
+"""
+import argparse
+import asyncio
+import json
+import logging
+import zlib
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from auth.models import ChatSession, ChatMessage, ChatMessageArchive
+from config import settings
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_MAX_CHARS = 4000
+SNIPPET_CHARS = 80
+SESSION_SCAN_SIZE = 200
+
+
+class CompactionReport:
+    def __init__(self, dry_run: bool):
+        self.dry_run = dry_run
+        self.sessions = 0
+        self.rows = 0
+        self.raw_bytes = 0  # message text removed from chat_messages
+        self.archived_bytes = 0
+
+    @property
+    def reclaimed_bytes(self) -> Optional[int]:
+        # A dry run compresses nothing, so it cannot tell how much the archive keeps
+        if self.dry_run:
+            return None
+        return self.raw_bytes - self.archived_bytes
+
+    def as_dict(self) -> dict:
+        return {
+            "dry_run": self.dry_run,
+            "sessions": self.sessions,
+            "rows": self.rows,
+            "raw_bytes": self.raw_bytes,
+            "archived_bytes": None if self.dry_run else self.archived_bytes,
+            "reclaimed_bytes": self.reclaimed_bytes,
+        }
+
+
+def fold_summary(summary: Optional[str], messages) -> str:
+    """Append a one-line digest of `messages` to the running summary, keeping it bounded."""
+    first, last = messages[0].timestamp, messages[-1].timestamp
+    line = f"{first:%Y-%m-%d}..{last:%Y-%m-%d}: {len(messages)} messages"
+    tools = sorted({tool for m in messages if m.tool_used for tool in m.tool_used.split(", ")})
+    if tools:
+        line += f", tools used: {', '.join(tools)}"
+    asked = [m.message[:SNIPPET_CHARS] for m in messages if m.sender == "user" and m.message]
+    if asked:
+        line += "; user asked: " + " | ".join(asked[-5:])
+
+    summary = f"{summary}\n{line}" if summary else line
+    if len(summary) > SUMMARY_MAX_CHARS:
+        # Drop the oldest lines first
+        summary = summary[-SUMMARY_MAX_CHARS:].split("\n", 1)[-1]
+    return summary
+
+
+def _expired_condition(db: Session, chat_session: ChatSession, now: datetime):
+    max_age = chat_session.retention_max_age_days
+    if max_age is None:
+        max_age = settings.chat_retention_max_age_days
+    max_messages = chat_session.retention_max_messages
+    if max_messages is None:
+        max_messages = settings.chat_retention_max_messages
+
+    conditions = []
+    if max_age:
+        conditions.append(ChatMessage.timestamp < now - timedelta(days=max_age))
+    if max_messages:
+        # Everything at or below the id of the first message past the newest N
+        boundary = db.query(ChatMessage.id).filter(
+            ChatMessage.session_id == chat_session.id
+        ).order_by(ChatMessage.id.desc()).offset(max_messages).limit(1).scalar()
+        if boundary is not None:
+            conditions.append(ChatMessage.id <= boundary)
+    return or_(*conditions) if conditions else None
+
+
+def compact_session(db: Session, chat_session: ChatSession, report: CompactionReport,
+                    batch_size: int, now: datetime) -> None:
+    expired = _expired_condition(db, chat_session, now)
+    if expired is None:
+        return
+    in_session = (ChatMessage.session_id == chat_session.id, expired)
+
+    if report.dry_run:
+        rows, raw_bytes = db.query(
+            func.count(ChatMessage.id), func.coalesce(func.sum(func.length(ChatMessage.message)), 0)
+        ).filter(*in_session).one()
+        if rows:
+            report.sessions += 1
+            report.rows += rows
+            report.raw_bytes += raw_bytes
+        return
+
+    touched = False
+    while True:
+        # The batch is read inside the write transaction, never from the
+        # read pool/replica. SKIP LOCKED lets several workers compact
+        # concurrently without archiving the same rows twice; on SQLite the
+        # writer's BEGIN IMMEDIATE serializes them instead
+        db.info["primary"] = True
+        batch = db.query(
+            ChatMessage.id, ChatMessage.sender, ChatMessage.message, ChatMessage.timestamp, ChatMessage.tool_used
+        ).filter(*in_session).order_by(ChatMessage.id).limit(batch_size).with_for_update(skip_locked=True).all()
+        if not batch:
+            # Ends the transaction so the write lock is not held across the scan
+            db.rollback()
+            db.info["primary"] = False
+            break
+        # The summary too: another worker may have folded a batch into it since
+        db.refresh(chat_session, with_for_update=True)
+
+        payload = json.dumps([
+            {"id": m.id, "sender": m.sender, "message": m.message,
+             "timestamp": m.timestamp.isoformat() if m.timestamp else None, "tool_used": m.tool_used}
+            for m in batch
+        ]).encode()
+        blob = zlib.compress(payload, 6)
+        db.add(ChatMessageArchive(
+            session_id=chat_session.id,
+            first_message_id=batch[0].id,
+            last_message_id=batch[-1].id,
+            first_timestamp=batch[0].timestamp,
+            last_timestamp=batch[-1].timestamp,
+            message_count=len(batch),
+            raw_bytes=len(payload),
+            payload=blob,
+            archived_at=now
+        ))
+        chat_session.summary = fold_summary(chat_session.summary, batch)
+        db.query(ChatMessage).filter(
+            ChatMessage.session_id == chat_session.id, ChatMessage.id.in_([m.id for m in batch])
+        ).delete(synchronize_session=False)
+        db.commit()
+        db.info["primary"] = False
+
+        touched = True
+        report.rows += len(batch)
+        report.raw_bytes += sum(len(m.message or "") for m in batch)
+        report.archived_bytes += len(blob)
+        if len(batch) < batch_size:
+            break
+
+    if touched:
+        report.sessions += 1
+
+
+def compact_all(dry_run: bool = False, batch_size: Optional[int] = None,
+                session_uuid: Optional[str] = None) -> CompactionReport:
+    report = CompactionReport(dry_run)
+    batch_size = batch_size or settings.chat_compaction_batch_size
+    now = datetime.now()
+    db = SessionLocal()
+    try:
+        last_id = 0
+        while True:
+            query = db.query(ChatSession).filter(ChatSession.id > last_id)
+            if session_uuid:
+                query = query.filter(ChatSession.session_uuid == session_uuid)
+            sessions = query.order_by(ChatSession.id).limit(SESSION_SCAN_SIZE).all()
+            if not sessions:
+                break
+            for chat_session in sessions:
+                compact_session(db, chat_session, report, batch_size, now)
+            last_id = sessions[-1].id
+            # Keep the identity map from growing across the whole scan
+            db.expunge_all()
+    finally:
+        db.close()
+    return report
+
+
+async def compaction_loop(interval_minutes: int) -> None:
+    while True:
+        await asyncio.sleep(interval_minutes * 60)
+        try:
+            report = await run_in_threadpool(compact_all)
+            logger.info("chat compaction: %s", report.as_dict())
+        except Exception:
+            logger.exception("chat compaction failed")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="only report what would be compacted")
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--session-uuid", default=None, help="limit to one session")
+    args = parser.parse_args(argv)
+
+    report = compact_all(dry_run=args.dry_run, batch_size=args.batch_size, session_uuid=args.session_uuid)
+    print(json.dumps(report.as_dict(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from pydantic import Field
+from typing import Optional
 
 class Settings(BaseSettings):
     app_name: str = "My FastAPI Application"
@@ -11,9 +12,51 @@ class Settings(BaseSettings):
     jwt_expiration_minutes: int
 
     database_url: str
+    # Optional read replica; read-only endpoints are routed there (see database.py)
+    database_replica_url: Optional[str] = None
+    read_your_writes_seconds: float = 5.0
+    replica_health_check_seconds: float = 10.0
+    # SQLite mode (file-backed sqlite:// database_url, see database.py)
+    sqlite_read_pool_size: int = 8
+    sqlite_cache_size_kb: int = 65536
+    sqlite_mmap_size_mb: int = 256
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_write_batch_size: int = 200
     
     open_router_key: str
 
+    # Response compression / caching
+    compression_minimum_size: int = 500
+    gzip_level: int = 6
+    brotli_quality: int = 4
+    response_cache_size: int = 2048
+    response_cache_max_bytes: int = 67108864  # bodies plus compressed variants, per worker
+    response_cache_max_entry_bytes: int = 4194304  # larger bodies are not cached
+
+    # Chat history retention (per-session overrides live on ChatSession)
+    chat_retention_max_age_days: int = 90
+    chat_retention_max_messages: int = 200
+    chat_compaction_batch_size: int = 500
+    chat_compaction_interval_minutes: int = 60  # 0 disables the background task
+
+    # Startup / health checks
+    readiness_timeout_seconds: float = 2.0
+
+    # MCP server over streamable HTTP at /mcp (mcp_config/http_app.py)
+    mcp_http_enabled: bool = True
+    mcp_resource_page_size: int = 500
+
+    # Idempotency-Key on mutating requests (idempotency.py)
+    idempotency_ttl_seconds: int = 86400
+    idempotency_cache_size: int = 10000
+    idempotency_lock_timeout_seconds: int = 300  # a claim older than this is taken over
+    idempotency_max_response_bytes: int = 1048576  # larger responses are not stored
+    idempotency_purge_interval_minutes: int = 60
+
+    # Recurring todos: window expanded when a list request gives no range
+    recurrence_window_past_days: int = 7
+    recurrence_window_future_days: int = 30
+
     class Config:
         env_file = ".env"  # No `: str` needed here!
 
@@ -1,10 +1,29 @@
-from sqlalchemy import create_engine
+from contextvars import ContextVar
+from threading import Lock
+import time
+from typing import Optional
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from config import settings
 
-engine = create_engine(settings.database_url)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+_url = make_url(settings.database_url)
+# File-backed SQLite gets its own tuning, see "SQLite mode" below
+sqlite_mode = _url.get_backend_name() == "sqlite" and _url.database not in (None, "", ":memory:")
+
+if sqlite_mode:
+    # One writer connection: concurrent writers wait for it in the pool
+    # instead of failing with "database is locked"
+    engine = create_engine(
+        settings.database_url,
+        pool_size=1,
+        max_overflow=0,
+        connect_args={"check_same_thread": False, "timeout": settings.sqlite_busy_timeout_ms / 1000},
+    )
+else:
+    # pre_ping replaces connections dropped during a DB blip instead of failing requests
+    engine = create_engine(settings.database_url, pool_pre_ping=True)
 Base = declarative_base()
 
 def get_db():
@@ -12,4 +31,199 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+# ---------- read replica routing ----------
+# Read-only handlers use ReadSessionLocal / get_read_db. Their queries go to
+# the replica when one is configured and healthy, anything flushed goes to
+# the primary. A user who just wrote is pinned to the primary for
+# read_your_writes_seconds so they always see their own writes (the pin is
+# tracked per worker process).
+
+replica_engine = (
+    create_engine(settings.database_replica_url, pool_pre_ping=True)
+    if settings.database_replica_url and not sqlite_mode else None
+)
+
+
+# ---------- SQLite mode ----------
+# WAL lets readers run alongside the single writer, so reads get their own
+# pool of query_only connections on the same file (used like a replica that
+# never lags). The writer begins with BEGIN IMMEDIATE: taking the write lock
+# up front means it waits in busy_timeout rather than failing when another
+# process committed first.
+
+def _tune_sqlite(dbapi_connection, read_only: bool) -> None:
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    # NORMAL only syncs at checkpoints in WAL mode and is still corruption safe
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA cache_size=-{settings.sqlite_cache_size_kb}")
+    cursor.execute(f"PRAGMA mmap_size={settings.sqlite_mmap_size_mb * 1024 * 1024}")
+    cursor.execute(f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    if read_only:
+        cursor.execute("PRAGMA query_only=ON")
+    cursor.close()
+
+
+if sqlite_mode:
+    replica_engine = create_engine(
+        settings.database_url,
+        pool_size=settings.sqlite_read_pool_size,
+        max_overflow=0,
+        connect_args={"check_same_thread": False, "timeout": settings.sqlite_busy_timeout_ms / 1000},
+    )
+
+    @event.listens_for(engine, "connect")
+    def _connect_writer(dbapi_connection, connection_record):
+        _tune_sqlite(dbapi_connection, read_only=False)
+        # Let SQLAlchemy emit BEGIN itself (pysqlite defers it and breaks SAVEPOINTs)
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin_writer(connection):
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+    @event.listens_for(replica_engine, "connect")
+    def _connect_reader(dbapi_connection, connection_record):
+        _tune_sqlite(dbapi_connection, read_only=True)
+
+
+class _ReplicaHealth:
+    def __init__(self):
+        self.healthy = True
+        self.checked_at = 0.0
+        self._lock = Lock()
+
+    def is_healthy(self) -> bool:
+        if time.monotonic() - self.checked_at >= settings.replica_health_check_seconds:
+            # One thread re-checks, the others keep using the last known state
+            if self._lock.acquire(blocking=False):
+                try:
+                    self.healthy = self._ping()
+                    self.checked_at = time.monotonic()
+                finally:
+                    self._lock.release()
+        return self.healthy
+
+    def mark_down(self) -> None:
+        self.healthy = False
+        self.checked_at = time.monotonic()
+
+    def _ping(self) -> bool:
+        try:
+            with replica_engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+            return True
+        except Exception:
+            return False
+
+
+replica_health = _ReplicaHealth()
+
+if replica_engine is not None:
+    @event.listens_for(replica_engine, "handle_error")
+    def _replica_error(context):
+        # Fail over to the primary until the next successful health check
+        if context.is_disconnect or context.connection is None:
+            replica_health.mark_down()
+
+
+_pinned_until = {}
+_pin_lock = Lock()
+# Per-request pin state set up by read_your_writes.py: {"pinned": user ids
+# whose signed cookie is still fresh, "wrote": user id that just wrote}. The
+# cookie carries the pin to whichever worker serves the next read.
+request_pins = ContextVar("request_pins", default=None)
+
+
+def pin_to_primary(user_id: int) -> None:
+    # SQLite readers share the writer's file, there is no lag to pin around
+    # (and a pinned reader would hold the only writer connection)
+    if sqlite_mode:
+        return
+    with _pin_lock:
+        _pinned_until[user_id] = time.monotonic() + settings.read_your_writes_seconds
+    pins = request_pins.get()
+    if pins is not None:
+        pins["wrote"] = user_id
+
+
+def is_pinned(user_id: Optional[int]) -> bool:
+    if user_id is None:
+        return False
+    pins = request_pins.get()
+    if pins is not None and user_id in pins["pinned"]:
+        return True
+    deadline = _pinned_until.get(user_id)
+    if deadline is None:
+        return False
+    if deadline < time.monotonic():
+        with _pin_lock:
+            _pinned_until.pop(user_id, None)
+        return False
+    return True
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, **kw):
+        # Only plain SELECTs outside a pending write may go to the replica
+        if (
+            replica_engine is not None
+            and getattr(clause, "is_select", False)
+            and not self._flushing
+            and not self.info.get("primary")
+            and not self.info.get("wrote")
+            and replica_health.is_healthy()
+        ):
+            return replica_engine
+        return engine
+
+
+# On SQLite every session routes, so a request only holds the writer
+# connection while it actually writes
+SessionLocal = sessionmaker(
+    class_=RoutingSession if sqlite_mode else Session, autocommit=False, autoflush=False, bind=engine
+)
+ReadSessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False)
+
+
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# Sessions learn their user via session.info["user_id"] (set by the auth
+# dependencies); committing a flush pins that user to the primary.
+@event.listens_for(SessionLocal, "after_flush")
+@event.listens_for(ReadSessionLocal, "after_flush")
+def _remember_write(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(SessionLocal, "after_bulk_update")
+@event.listens_for(SessionLocal, "after_bulk_delete")
+@event.listens_for(ReadSessionLocal, "after_bulk_update")
+@event.listens_for(ReadSessionLocal, "after_bulk_delete")
+def _remember_bulk_write(update_context):
+    update_context.session.info["wrote"] = True
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+@event.listens_for(ReadSessionLocal, "after_rollback")
+def _forget_write(session):
+    session.info.pop("wrote", None)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+@event.listens_for(ReadSessionLocal, "after_commit")
+def _pin_writer(session):
+    if session.info.pop("wrote", False) and replica_engine is not None:
+        user_id = session.info.get("user_id")
+        if user_id is not None:
+            pin_to_primary(user_id)
@@ -0,0 +1,290 @@
+import gzip
+import hashlib
+import json
+import zlib
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Hashable, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from starlette.datastructures import Headers, MutableHeaders
+
+from config import settings
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick the best encoding we support from an Accept-Encoding header."""
+    weights = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[token] = q
+
+    best, best_q = None, 0.0
+    for encoding in SUPPORTED_ENCODINGS:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.brotli_quality)
+    return gzip.compress(body, compresslevel=settings.gzip_level)
+
+
+class CompressionMiddleware:
+    """Content-negotiated gzip/brotli compression for responses above a size threshold.
+
+    Responses that already carry a Content-Encoding (e.g. pre-compressed cached
+    bodies from `cached_response`) and event streams are passed through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = 500):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self.app, encoding, self.minimum_size)
+        await responder(scope, receive, send)
+
+
+class _CompressionResponder:
+    def __init__(self, app, encoding: str, minimum_size: int):
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.send = None
+        self.start_message = None
+        self.started = False
+        self.passthrough = False
+        self.compressor = None
+
+    async def __call__(self, scope, receive, send):
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    async def send_compressed(self, message):
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            self.start_message = message
+            self.passthrough = (
+                "content-encoding" in headers
+                or headers.get("content-type", "").startswith("text/event-stream")
+            )
+            return
+
+        if message_type != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.passthrough:
+            if not self.started:
+                self.started = True
+                await self.send(self.start_message)
+            await self.send(message)
+            return
+
+        if not self.started:
+            self.started = True
+            if not more_body:
+                if len(body) < self.minimum_size:
+                    await self.send(self.start_message)
+                    await self.send(message)
+                    return
+                body = compress(body, self.encoding)
+                headers = self._encoded_headers()
+                headers["Content-Length"] = str(len(body))
+                await self.send(self.start_message)
+                await self.send({"type": "http.response.body", "body": body})
+                return
+
+            # Streaming response: compress chunk by chunk, flushing each so
+            # clients see progress as it is produced.
+            headers = self._encoded_headers()
+            del headers["Content-Length"]
+            self.compressor = _StreamCompressor(self.encoding)
+            await self.send(self.start_message)
+
+        chunk = self.compressor.process(body)
+        if not more_body:
+            chunk += self.compressor.finish()
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    def _encoded_headers(self) -> MutableHeaders:
+        headers = MutableHeaders(raw=self.start_message["headers"])
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        return headers
+
+
+class _StreamCompressor:
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=settings.brotli_quality)
+        else:
+            self._compressor = zlib.compressobj(settings.gzip_level, zlib.DEFLATED, 31)
+
+    def process(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.flush()
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+def fingerprint(*parts) -> str:
+    """Cheap content fingerprint of already-loaded values, used as the ETag."""
+    return hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+
+
+class _CacheEntry:
+    __slots__ = ("etag", "body", "encoded", "size")
+
+    def __init__(self, etag: str, body: bytes):
+        self.etag = etag
+        self.body = body
+        self.encoded = {}
+        self.size = len(body)  # body plus compressed variants
+
+
+class ResponseCache:
+    """LRU of serialized (and lazily compressed) JSON bodies, one entry per key.
+
+    An entry is only reused while its ETag matches the current fingerprint of
+    the underlying data, so a changed fingerprint simply replaces it. Bounded
+    both by entry count and by the total bytes of bodies and their variants.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Hashable, etag: str) -> Optional[_CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.etag != etag:
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: Hashable, entry: _CacheEntry) -> None:
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= previous.size
+            self._entries[key] = entry
+            self.total_bytes += entry.size
+            self._evict()
+
+    def add_encoding(self, key: Hashable, entry: _CacheEntry, encoding: str, data: bytes) -> None:
+        with self._lock:
+            if encoding in entry.encoded:
+                return
+            entry.encoded[encoding] = data
+            entry.size += len(data)
+            if self._entries.get(key) is entry:
+                self.total_bytes += len(data)
+                self._evict()
+
+    def _evict(self) -> None:
+        while self._entries and (len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes):
+            _, evicted = self._entries.popitem(last=False)
+            self.total_bytes -= evicted.size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+
+response_cache = ResponseCache(settings.response_cache_size, settings.response_cache_max_bytes)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: W/"x" and "x" are equivalent for If-None-Match
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in tags
+
+
+def cached_response(request: Request, key: Hashable, version: str, build: Callable[[], object]) -> Response:
+    """Serve a JSON read endpoint with ETag revalidation and a body cache.
+
+    `version` must change whenever the data behind `key` changes. `build` is
+    only called when no cached body exists for that version; the serialized
+    body and its compressed variants are then reused for identical polls.
+    """
+    etag = f'W/"{version}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "private, no-cache",
+        "Vary": "Accept-Encoding, Authorization",
+    }
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    entry = response_cache.get(key, etag)
+    cacheable = True
+    if entry is None:
+        body = json.dumps(jsonable_encoder(build()), separators=(",", ":")).encode()
+        entry = _CacheEntry(etag, body)
+        # Very large bodies (heavy tenants) are served but not kept
+        cacheable = len(body) <= settings.response_cache_max_entry_bytes
+        if cacheable:
+            response_cache.put(key, entry)
+
+    body = entry.body
+    encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+    if encoding and len(body) >= settings.compression_minimum_size:
+        compressed = entry.encoded.get(encoding)
+        if compressed is None:
+            compressed = compress(body, encoding)
+            if cacheable:
+                response_cache.add_encoding(key, entry, encoding, compressed)
+        body = compressed
+        headers["Content-Encoding"] = encoding
+
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,348 @@
+"""Idempotency-Key support for mutating requests.
+
+A retried POST /auth/todo or /ai/chat carrying the same Idempotency-Key
+gets the stored response of the first attempt instead of running again
+(no duplicate todo, no second agent loop). Keys are scoped to the user of
+the Bearer token and kept for idempotency_ttl_seconds. Requests without a
+valid token run as if the header were absent, anonymous callers would
+otherwise share one key space:
+
+- an in-memory LRU answers repeats served by this worker,
+- the `idempotency_keys` table claims a key across workers and stores the
+  response,
+- a duplicate arriving while the first request still runs waits for it
+  (an in-process future, or polling the claim row for other workers).
+
+Reusing a key for a different request is rejected with 422. 5xx responses
+and exceptions are not stored, so those may be retried.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Hashable, List, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+from auth.jwt import verify_access_token
+from auth.models import IdempotencyKey
+from config import settings
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+MUTATING_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+# Streaming uploads and MCP (which has its own sessions) are not buffered
+EXCLUDED_PREFIXES = ("/auth/import/", "/mcp")
+MAX_KEY_LENGTH = 255
+POLL_SECONDS = 0.2
+
+CLAIMED = "claimed"
+IN_PROGRESS = "in_progress"
+MISMATCH = "mismatch"
+
+
+class StoredResponse:
+    __slots__ = ("request_hash", "status", "headers", "body", "expires_at")
+
+    def __init__(self, request_hash: str, status: int, headers: List[Tuple[bytes, bytes]],
+                 body: bytes, expires_at: datetime):
+        self.request_hash = request_hash
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.expires_at = expires_at
+
+    @classmethod
+    def from_row(cls, row: IdempotencyKey) -> "StoredResponse":
+        headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in json.loads(row.response_headers)]
+        return cls(row.request_hash, row.status_code, headers, row.response_body, row.expires_at)
+
+
+class IdempotencyCache:
+    """LRU of stored responses that drops entries past their expiry."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Hashable) -> Optional[StoredResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= datetime.now():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: Hashable, entry: StoredResponse) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+# ---------- claim table (blocking, run in the threadpool) ----------
+
+def _claim(owner: str, key: str, request_hash: str):
+    """CLAIMED, IN_PROGRESS, MISMATCH or the StoredResponse of a finished request."""
+    now = datetime.now()
+    db = SessionLocal()
+    try:
+        same_key = (IdempotencyKey.owner == owner, IdempotencyKey.key == key)
+        row = db.query(IdempotencyKey).filter(*same_key).first()
+        if row is not None and row.expires_at <= now:
+            db.query(IdempotencyKey).filter(*same_key, IdempotencyKey.expires_at <= now).delete(synchronize_session=False)
+            row = None
+        if row is None:
+            db.add(IdempotencyKey(
+                owner=owner,
+                key=key,
+                request_hash=request_hash,
+                locked_at=now,
+                expires_at=now + timedelta(seconds=settings.idempotency_ttl_seconds)
+            ))
+            try:
+                db.commit()
+            except IntegrityError:
+                # Another worker claimed it first
+                db.rollback()
+                return IN_PROGRESS
+            return CLAIMED
+
+        if row.request_hash != request_hash:
+            return MISMATCH
+        if row.status_code is not None:
+            return StoredResponse.from_row(row)
+        if row.locked_at > now - timedelta(seconds=settings.idempotency_lock_timeout_seconds):
+            return IN_PROGRESS
+
+        # The worker running it went away: take the claim over, only one
+        # of several waiters can win the compare-and-set
+        taken = db.query(IdempotencyKey).filter(
+            *same_key, IdempotencyKey.locked_at == row.locked_at
+        ).update({"locked_at": now}, synchronize_session=False)
+        db.commit()
+        return CLAIMED if taken else IN_PROGRESS
+    finally:
+        db.close()
+
+
+def _store(owner: str, key: str, stored: StoredResponse) -> None:
+    db = SessionLocal()
+    try:
+        db.query(IdempotencyKey).filter(IdempotencyKey.owner == owner, IdempotencyKey.key == key).update({
+            "status_code": stored.status,
+            "response_headers": json.dumps([[n.decode("latin-1"), v.decode("latin-1")] for n, v in stored.headers]),
+            "response_body": stored.body,
+        }, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _release(owner: str, key: str) -> None:
+    db = SessionLocal()
+    try:
+        db.query(IdempotencyKey).filter(
+            IdempotencyKey.owner == owner, IdempotencyKey.key == key, IdempotencyKey.status_code.is_(None)
+        ).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def purge_expired() -> int:
+    db = SessionLocal()
+    try:
+        deleted = db.query(IdempotencyKey).filter(
+            IdempotencyKey.expires_at <= datetime.now()
+        ).delete(synchronize_session=False)
+        db.commit()
+        return deleted
+    finally:
+        db.close()
+
+
+async def purge_loop(interval_minutes: int) -> None:
+    while True:
+        await asyncio.sleep(interval_minutes * 60)
+        try:
+            deleted = await run_in_threadpool(purge_expired)
+            logger.info("idempotency keys purged: %s", deleted)
+        except Exception:
+            logger.exception("idempotency key purge failed")
+
+
+# ---------- middleware ----------
+
+def _owner(authorization: Optional[str]) -> Optional[str]:
+    scheme, _, token = (authorization or "").partition(" ")
+    payload = verify_access_token(token) if scheme.lower() == "bearer" and token else None
+    if payload is None or payload.get("sub") is None:
+        return None
+    return str(payload["sub"])
+
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+def _replaying(body: bytes, receive):
+    sent = False
+
+    async def replay():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+
+    return replay
+
+
+class IdempotencyMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self.cache = IdempotencyCache(settings.idempotency_cache_size)
+        self._in_flight = {}
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in MUTATING_METHODS
+            or scope["path"].startswith(EXCLUDED_PREFIXES)
+        ):
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        key = headers.get("idempotency-key")
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        if not key or len(key) > MAX_KEY_LENGTH:
+            await JSONResponse(
+                status_code=400, content={"detail": f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters"}
+            )(scope, receive, send)
+            return
+
+        owner = _owner(headers.get("authorization"))
+        if owner is None:
+            await self.app(scope, receive, send)
+            return
+
+        body = await _read_body(receive)
+        receive = _replaying(body, receive)
+        request_hash = hashlib.blake2b(
+            b"\0".join([scope["method"].encode(), scope["path"].encode(), scope.get("query_string", b""), body]),
+            digest_size=16
+        ).hexdigest()
+        slot = (owner, key)
+
+        while True:
+            stored = self.cache.get(slot)
+            if stored is not None:
+                await self._replay(stored, request_hash, scope, receive, send)
+                return
+
+            running = self._in_flight.get(slot)
+            if running is not None:
+                # Same key already executing in this worker: wait, then look again
+                await asyncio.shield(running)
+                continue
+
+            done = asyncio.get_running_loop().create_future()
+            self._in_flight[slot] = done
+            claimed = False
+            try:
+                outcome = await run_in_threadpool(_claim, owner, key, request_hash)
+                if outcome == MISMATCH:
+                    await self._mismatch(scope, receive, send)
+                    return
+                if outcome == IN_PROGRESS:
+                    # Running in another worker; local duplicates queue behind this poll
+                    await asyncio.sleep(POLL_SECONDS)
+                    continue
+                if isinstance(outcome, StoredResponse):
+                    self.cache.put(slot, outcome)
+                    continue
+
+                claimed = True
+                stored = await self._execute(scope, receive, send, request_hash)
+                if stored is None:
+                    claimed = False
+                    await run_in_threadpool(_release, owner, key)
+                else:
+                    await run_in_threadpool(_store, owner, key, stored)
+                    self.cache.put(slot, stored)
+                return
+            except BaseException:
+                if claimed:
+                    # Let a retry run it again; shielded so a cancelled request still releases the claim
+                    await asyncio.shield(run_in_threadpool(_release, owner, key))
+                raise
+            finally:
+                del self._in_flight[slot]
+                done.set_result(None)
+
+    async def _execute(self, scope, receive, send, request_hash: str) -> Optional[StoredResponse]:
+        """Run the request, streaming the response through while keeping a copy."""
+        start = {}
+        chunks = []
+        size = 0
+
+        async def capture(message):
+            nonlocal size
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body" and size <= settings.idempotency_max_response_bytes:
+                chunk = message.get("body", b"")
+                size += len(chunk)
+                chunks.append(chunk)
+            await send(message)
+
+        await self.app(scope, receive, capture)
+
+        if not start or start["status"] >= 500 or size > settings.idempotency_max_response_bytes:
+            return None
+        return StoredResponse(
+            request_hash,
+            start["status"],
+            list(start.get("headers", [])),
+            b"".join(chunks),
+            datetime.now() + timedelta(seconds=settings.idempotency_ttl_seconds)
+        )
+
+    async def _replay(self, stored: StoredResponse, request_hash: str, scope, receive, send) -> None:
+        if stored.request_hash != request_hash:
+            await self._mismatch(scope, receive, send)
+            return
+        await send({
+            "type": "http.response.start",
+            "status": stored.status,
+            "headers": stored.headers + [(b"idempotent-replayed", b"true")],
+        })
+        await send({"type": "http.response.body", "body": stored.body})
+
+    async def _mismatch(self, scope, receive, send) -> None:
+        await JSONResponse(
+            status_code=422, content={"detail": "Idempotency-Key was already used for a different request"}
+        )(scope, receive, send)
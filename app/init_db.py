@@ -0,0 +1,49 @@
+"""Create or migrate the database schema.
+
+A fresh database gets the current schema from the models, is stamped at
+FRESH_SCHEMA_REVISION, runs the LAYOUT_REVISIONS after it and is then
+stamped at head; an existing one is just upgraded with Alembic. Databases
+created by the old import-time create_all() have no alembic_version and
+are stamped at BASELINE_REVISION first:
+
+    python init_db.py
+"""
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import inspect
+
+from database import engine, Base
+import auth.models  # noqa: F401 - registers the tables on Base.metadata
+
+ALEMBIC_INI = Path(__file__).resolve().parent / "alembic.ini"
+# Schema that main.py's create_all() built before migrations were run
+BASELINE_REVISION = "49"
+# Last revision whose schema create_all() reproduces exactly
+FRESH_SCHEMA_REVISION = "51"
+# Later revisions that change the physical layout (e.g. partitioning), which
+# create_all() cannot reproduce. Tables and columns added by the other later
+# revisions are already in the models.
+LAYOUT_REVISIONS = ("52",)
+
+
+def main() -> None:
+    config = Config(str(ALEMBIC_INI))
+    if inspect(engine).get_table_names():
+        with engine.connect() as connection:
+            current = MigrationContext.configure(connection).get_current_revision()
+        if current is None:
+            command.stamp(config, BASELINE_REVISION)
+        command.upgrade(config, "head")
+    else:
+        Base.metadata.create_all(bind=engine)
+        command.stamp(config, FRESH_SCHEMA_REVISION)
+        for revision in LAYOUT_REVISIONS:
+            command.upgrade(config, revision)
+        command.stamp(config, "head")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,59 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from auth.models import User
-from database import engine, Base
+from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
+from http_cache import CompressionMiddleware
+from idempotency import IdempotencyMiddleware, purge_loop
+from read_your_writes import ReadYourWritesMiddleware
+from config import settings
+from database import engine, replica_engine, sqlite_mode
+from chat_retention import compaction_loop
+from mcp_config.http_app import mcp_http_app
+import asyncio
+import logging
 import os
 
 from auth.router import router as auth_router, chat_router as ai_router
+from auth.transfer import transfer_router
 
-Base.metadata.create_all(bind=engine)
-app = FastAPI()
+logger = logging.getLogger(__name__)
 
-import sys
-print("=== STARTING APPLICATION ===", flush=True)
-print(f"Python version: {sys.version}", flush=True)
+# Importing this module must stay cheap and side-effect free: no DB access,
+# no heavy imports (mcp, httpx are loaded on first use). The schema is
+# managed by Alembic, see init_db.py. Budget: benchmarks/startup.py
 
-try:
-    from config import settings
-    print(f"DATABASE_URL loaded: {settings.database_url[:20]}...", flush=True)
-except Exception as e:
-    print(f"ERROR loading config: {e}", flush=True)
-    raise
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    background = []
+    if settings.chat_compaction_interval_minutes > 0:
+        background.append(asyncio.create_task(
+            compaction_loop(settings.chat_compaction_interval_minutes)
+        ))
+    if settings.idempotency_purge_interval_minutes > 0:
+        background.append(asyncio.create_task(
+            purge_loop(settings.idempotency_purge_interval_minutes)
+        ))
+    logger.info("application started")
+    yield
+    for task in background:
+        task.cancel()
+    await mcp_http_app.shutdown()
+    engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
+
+# Replays of retried mutating requests (Idempotency-Key). Added first so it
+# sits innermost: stored bodies are uncompressed and CORS headers stay per request
+app.add_middleware(IdempotencyMiddleware)
+
+# Carries the read-your-writes pin to the next request as a cookie, so it
+# holds whichever worker serves that read. Outside the idempotency layer:
+# a replayed response did not write
+app.add_middleware(ReadYourWritesMiddleware)
 
 # Parse allowed origins from environment variable
 allowed_origins_str = os.getenv("ALLOWED_ORIGINS", "http://localhost:5173,http://127.0.0.1:5173")
@@ -34,10 +68,39 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip/brotli for anything above the size threshold; tiny responses skip it
+app.add_middleware(CompressionMiddleware, minimum_size=settings.compression_minimum_size)
+
 # Include routers
 app.include_router(auth_router)
 app.include_router(ai_router)
+app.include_router(transfer_router)
+
+# MCP clients (streamable HTTP, SSE streams) share this process and its pools
+if settings.mcp_http_enabled:
+    app.router.add_route("/mcp", mcp_http_app, include_in_schema=False)
 
 @app.get("/")
 def system_check():
     return JSONResponse(content={"status": "ok"})
+
+@app.get("/healthz")
+def liveness():
+    # The process is up and serving; deliberately no dependency checks
+    return JSONResponse(content={"status": "ok"})
+
+def _ping_database():
+    # In SQLite mode the writer is a single connection that begins with BEGIN
+    # IMMEDIATE, so pinging it would report down whenever a write is running;
+    # the read pool opens the same file without waiting on the write lock
+    with (replica_engine if sqlite_mode else engine).connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+@app.get("/readyz")
+async def readiness():
+    try:
+        await asyncio.wait_for(run_in_threadpool(_ping_database), timeout=settings.readiness_timeout_seconds)
+    except Exception as e:
+        logger.warning("readiness check failed: %s", e)
+        return JSONResponse(status_code=503, content={"status": "unavailable", "database": "down"})
+    return JSONResponse(content={"status": "ok", "database": "up"})
\ No newline at end of file
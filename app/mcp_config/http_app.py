@@ -0,0 +1,106 @@
+"""The MCP server over the streamable HTTP transport, mounted at /mcp.
+
+External MCP clients talk to the API process itself (same engine pools,
+replica routing and caches) instead of each spawning a stdio server.
+Requests need the API's Bearer token; tools then act as that user.
+
+The mcp package is imported and the session manager started on the first
+/mcp request so application startup stays fast (benchmarks/startup.py).
+Sessions are stateless (the tools keep no per-session state), so any
+worker can serve any request and no sticky routing is needed.
+"""
+import asyncio
+import json
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from auth.jwt import verify_access_token
+from auth.models import User
+from database import ReadSessionLocal, is_pinned
+
+
+def _load_user(user_id: int) -> Optional[User]:
+    db = ReadSessionLocal(info={"user_id": user_id, "primary": is_pinned(user_id)})
+    try:
+        return db.query(User).filter(User.id == user_id).first()
+    finally:
+        db.close()
+
+
+async def _authenticate(scope) -> Optional[User]:
+    authorization = dict(scope["headers"]).get(b"authorization", b"").decode("latin-1")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    payload = verify_access_token(token)
+    if payload is None or payload.get("sub") is None:
+        return None
+    return await run_in_threadpool(_load_user, int(payload["sub"]))
+
+
+async def _unauthorized(send) -> None:
+    body = json.dumps({"detail": "Could not validate credentials"}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": 401,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"www-authenticate", b"Bearer"),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class MCPHttpApp:
+    def __init__(self):
+        self._manager = None
+        self._task = None
+        self._stop = None
+        self._lock = asyncio.Lock()
+
+    async def __call__(self, scope, receive, send):
+        user = await _authenticate(scope)
+        if user is None:
+            await _unauthorized(send)
+            return
+        # Read back by the tool handlers through server.request_context.request.user
+        scope["user"] = user
+        manager = await self._started()
+        await manager.handle_request(scope, receive, send)
+
+    async def _started(self):
+        if self._manager is None:
+            async with self._lock:
+                if self._manager is None:
+                    from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+                    from mcp_config.server_setup import server
+
+                    manager = StreamableHTTPSessionManager(app=server, stateless=True)
+                    ready = asyncio.Event()
+                    self._stop = asyncio.Event()
+                    self._task = asyncio.create_task(self._serve(manager, ready))
+                    await ready.wait()
+                    if self._task.done():
+                        self._task.result()  # surfaces the startup error
+                    self._manager = manager
+        return self._manager
+
+    async def _serve(self, manager, ready: asyncio.Event) -> None:
+        # run() owns the task group of every MCP session; it has to be
+        # entered and left in the same task, hence this long-lived one
+        try:
+            async with manager.run():
+                ready.set()
+                await self._stop.wait()
+        finally:
+            ready.set()
+
+    async def shutdown(self) -> None:
+        if self._task is not None:
+            self._stop.set()
+            await self._task
+
+
+mcp_http_app = MCPHttpApp()
@@ -1,14 +1,18 @@
 import asyncio
 from mcp.server import Server
-from mcp.types import Tool, TextContent, Resource, Prompt, PromptMessage, PromptArgument
+from mcp.server.lowlevel.helper_types import ReadResourceContents
+from mcp.types import Tool, TextContent, Resource, ResourceTemplate, Prompt, PromptMessage, PromptArgument
 import mcp.server.stdio
 import httpx
 import os
 from auth.models import User, TODO
-from database import SessionLocal
-from datetime import datetime
+from database import SessionLocal, ReadSessionLocal, is_pinned
+from datetime import datetime, timedelta
+from recurrence import normalize_rule, collapse, expand_series, default_window, override_occurrence, delete_overrides
 from config import settings
 from sqlalchemy import func
+from starlette.concurrency import run_in_threadpool
+from urllib.parse import urlsplit, parse_qs, urlencode
 
 
 OPEN_ROUTER_KEY = settings.open_router_key
@@ -30,6 +34,10 @@ async def list_tools():
                     "date": {
                         "type": "string", 
                         "description": "The ISO date when the task should happen (YYYY-MM-DD). If not specified, use today."
+                    },
+                    "recurrence": {
+                        "type": "string",
+                        "description": "For a repeating task only: RRULE such as 'FREQ=DAILY;UNTIL=2027-10-19'; 'date' is the first occurrence"
                     }
                 },
                 "required": ["username", "notes", "date"]
@@ -47,15 +55,44 @@ async def list_tools():
             }
         )
     ]
+def _http_user():
+    # The user authenticated by mcp_config/http_app.py, None over stdio and
+    # for in-process calls from the chat route
+    try:
+        request = server.request_context.request
+    except LookupError:
+        return None
+    return request.scope.get("user") if request is not None else None
+
+
+def _may_list_users():
+    # The user directory is for local stdio clients and, over HTTP, the admin only
+    user = _http_user()
+    return user is None or user.email == settings.admin_email
+
+
 @server.call_tool()
 async def handle_tool_call(name: str, arguments: dict):
+    user = _http_user()
+    if user is not None:
+        # HTTP clients act as the token's user, whatever username they pass
+        arguments = {**arguments, "username": user.username}
+    # The DB work blocks, keep it off the event loop shared with the API
+    return await run_in_threadpool(_run_tool, name, arguments)
+
+
+def _run_tool(name: str, arguments: dict):
+    db = None
     try:
-        db = SessionLocal()
+        # Lookups can be served by the read replica, everything else by the primary
+        db = ReadSessionLocal() if name == "get_todos" else SessionLocal()
         username = arguments.get("username")
         user = db.query(User).filter(User.username == username).first()
         
         if not user:
             return [TextContent(type="text", text="User not found!")]
+        db.info["user_id"] = user.id
+        db.info["primary"] = is_pinned(user.id)
 
         # --- EXISTING: CREATE SINGLE ---
         if name == "create_todo":
@@ -67,26 +104,47 @@ async def handle_tool_call(name: str, arguments: dict):
                 final_date = datetime.strptime(date_from_ai, "%Y-%m-%d") if date_from_ai else datetime.now()
             except ValueError:
                 final_date = datetime.now()
+            try:
+                recurrence = normalize_rule(arguments.get("recurrence"))
+            except ValueError as e:
+                return [TextContent(type="text", text=f"Invalid recurrence: {e}")]
 
-            new_todo = TODO(user_id=user.id, notes=note_content, date=final_date, status=status_from_ai, priority=priority_from_ai)
+            new_todo = TODO(user_id=user.id, notes=note_content, date=final_date, status=status_from_ai, priority=priority_from_ai, recurrence=recurrence)
             db.add(new_todo)
             db.commit()
+            if recurrence:
+                return [TextContent(type="text", text=f"Successfully added repeating todo ({recurrence}) for {username}!")]
             return [TextContent(type="text", text=f"Successfully added todo for {username}!")]
 
         # --- NEW: BULK CREATE ---
         if name == "bulk_create_todos":
             tasks_data = arguments.get("tasks", []) # Expecting list of {'notes': '...', 'date': '...'}
-            created_count = 0
+            # The same task on evenly spaced dates ("daily standup for a year")
+            # is stored once as a recurring todo instead of one row per day
+            groups = {}
             for task in tasks_data:
                 try:
                     t_date = datetime.strptime(task.get("date"), "%Y-%m-%d") if task.get("date") else datetime.now()
                 except:
                     t_date = datetime.now()
-                
-                db.add(TODO(user_id=user.id, notes=task.get("notes"), date=t_date, status=task.get('status'), priority=task.get('priority')))
-                created_count += 1
+                groups.setdefault((task.get("notes"), task.get('status'), task.get('priority')), []).append(t_date)
+
+            created_count, series_count = 0, 0
+            for (notes, task_status, task_priority), dates in groups.items():
+                rule = collapse([d.date() for d in dates])
+                if rule is not None:
+                    db.add(TODO(user_id=user.id, notes=notes, date=min(dates), status=task_status, priority=task_priority, recurrence=str(rule)))
+                    series_count += 1
+                    continue
+                for t_date in dates:
+                    db.add(TODO(user_id=user.id, notes=notes, date=t_date, status=task_status, priority=task_priority))
+                    created_count += 1
             
             db.commit()
+            if series_count:
+                return [TextContent(type="text", text=(
+                    f"Successfully created {created_count} tasks and {series_count} repeating tasks in bulk!"
+                ))]
             return [TextContent(type="text", text=f"Successfully created {created_count} tasks in bulk!")]
 
         # --- NEW: EDIT ---
@@ -95,7 +153,25 @@ async def handle_tool_call(name: str, arguments: dict):
             todo = db.query(TODO).filter(TODO.id == todo_id, TODO.user_id == user.id).first()
             if not todo:
                 return [TextContent(type="text", text=f"Task with ID {todo_id} not found.")]
-            
+
+            if arguments.get("occurrence_date"):
+                # One occurrence of a repeating todo: stored as a sparse override
+                changes = {field: arguments[field] for field in ("notes", "status", "priority", "skipped") if field in arguments}
+                try:
+                    occurrence_date = datetime.strptime(arguments["occurrence_date"], "%Y-%m-%d").date()
+                    override_occurrence(db, todo, occurrence_date, changes)
+                except ValueError as e:
+                    return [TextContent(type="text", text=f"Could not update occurrence: {e}")]
+                db.commit()
+                return [TextContent(type="text", text=f"Task {todo_id} on {occurrence_date} has been updated!")]
+
+            if "recurrence" in arguments:
+                try:
+                    todo.recurrence = normalize_rule(arguments.get("recurrence"))
+                except ValueError as e:
+                    return [TextContent(type="text", text=f"Invalid recurrence: {e}")]
+                if todo.recurrence is None:
+                    delete_overrides(db, user.id, [todo.id])
             if "notes" in arguments:
                 todo.notes = arguments.get("notes")
             if "date" in arguments:
@@ -118,20 +194,23 @@ async def handle_tool_call(name: str, arguments: dict):
                 return [TextContent(type="text", text="No IDs provided to delete.")]
             
             # This deletes all IDs in the list that belong to the user
+            delete_overrides(db, user.id, todo_ids)
             deleted_count = db.query(TODO).filter(TODO.id.in_(todo_ids), TODO.user_id == user.id).delete(synchronize_session=False)
             db.commit()
             return [TextContent(type="text", text=f"Successfully deleted {deleted_count} tasks.")]
 
         # --- EXISTING: GETS ---
         if name == "get_todos":
-            # 1. Start with a base query for the current user
-            query = db.query(TODO).filter(TODO.user_id == user.id)
+            # 1. Start with a base query for the current user (repeating todos are expanded below)
+            query = db.query(TODO).filter(TODO.user_id == user.id, TODO.recurrence.is_(None))
+            window_start, window_end = default_window()
 
             # 2. Add dynamic filters based on what the AI sent
             if "date" in arguments:
                 # Assuming your date is stored as a DateTime, we match the day
                 target_date = datetime.strptime(arguments["date"], "%Y-%m-%d").date()
                 query = query.filter(func.date(TODO.date) == target_date)
+                window_start, window_end = target_date, target_date + timedelta(days=1)
             
             if "status" in arguments:
                 query = query.filter(TODO.status == arguments["status"])
@@ -141,8 +220,13 @@ async def handle_tool_call(name: str, arguments: dict):
 
             # 3. Execute the query
             tasks = query.all()
+            occurrences = [
+                o for o in expand_series(db, user.id, window_start, window_end)
+                if o["status"] == arguments.get("status", o["status"])
+                and o["priority"] == arguments.get("priority", o["priority"])
+            ]
 
-            if not tasks:
+            if not tasks and not occurrences:
                 return [TextContent(type="text", text="[]")] # Return empty array for JSON mode
 
             # 4. Format the output so the AI can read it
@@ -155,6 +239,16 @@ async def handle_tool_call(name: str, arguments: dict):
                     "status": t.status,
                     "priority": t.priority
                 })
+            for o in occurrences:
+                results.append({
+                    "id": o["id"],
+                    "notes": o["notes"],
+                    "date": o["date"].strftime("%Y-%m-%d"),
+                    "status": o["status"],
+                    "priority": o["priority"],
+                    "recurrence": o["recurrence"],
+                    "occurrence_date": o["occurrence_date"].isoformat()
+                })
             
             import json
             return [TextContent(type="text", text=json.dumps(results))]
@@ -163,25 +257,68 @@ async def handle_tool_call(name: str, arguments: dict):
         traceback.print_exc()
         return [TextContent(type="text", text=f"Baka! Something went wrong: {str(e)}")]
     finally:
-        db.close()
+        if db is not None:
+            db.close()
 @server.list_resources()
 async def list_resources():
+    if not _may_list_users():
+        return []
     return [
         {
             "uri": "db://users/list",
             "name": "User Directory",
-            "description": "A list of all registered usernames",
+            "description": (
+                "Registered usernames, one per line, in pages of at most "
+                f"{settings.mcp_resource_page_size}. A text/uri-list entry links the next page."
+            ),
             "mimeType": "text/plain"
         }
     ]
 
-@server.read_resource()
-async def read_resource(uri: str):
-    if uri == "db://users/list":
-        db = SessionLocal()
-        users = db.query(User).all()
+@server.list_resource_templates()
+async def list_resource_templates():
+    if not _may_list_users():
+        return []
+    return [
+        ResourceTemplate(
+            uriTemplate="db://users/list{?cursor,limit}",
+            name="User Directory page",
+            description="Usernames after `cursor` (exclusive), at most `limit` of them",
+            mimeType="text/plain"
+        )
+    ]
+
+def _username_page(cursor, limit):
+    db = ReadSessionLocal()
+    try:
+        query = db.query(User.username)
+        if cursor:
+            query = query.filter(User.username > cursor)
+        return [row.username for row in query.order_by(User.username).limit(limit)]
+    finally:
         db.close()
-        return "\n".join([u.username for u in users])
+
+@server.read_resource()
+async def read_resource(uri):
+    parts = urlsplit(str(uri))
+    if (parts.scheme, parts.netloc, parts.path) == ("db", "users", "/list") and _may_list_users():
+        params = parse_qs(parts.query)
+        cursor = params.get("cursor", [None])[0]
+        try:
+            limit = int(params.get("limit", [settings.mcp_resource_page_size])[0])
+        except ValueError:
+            limit = settings.mcp_resource_page_size
+        limit = max(1, min(limit, settings.mcp_resource_page_size))
+
+        # Keyset pagination on the unique username: one extra row tells
+        # whether another page follows
+        names = await run_in_threadpool(_username_page, cursor, limit + 1)
+        contents = [ReadResourceContents(content="\n".join(names[:limit]), mime_type="text/plain")]
+        if len(names) > limit:
+            next_uri = "db://users/list?" + urlencode({"cursor": names[limit - 1], "limit": limit})
+            contents.append(ReadResourceContents(content=next_uri, mime_type="text/uri-list"))
+        return contents
+    raise ValueError(f"Unknown resource: {uri}")
 
 @server.list_prompts()
 async def list_prompts():
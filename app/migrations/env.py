@@ -1,8 +1,11 @@
 # migrations/env.py
-import os
+from logging.config import fileConfig
 from dotenv import load_dotenv
 from pathlib import Path
 
+from alembic import context
+from sqlalchemy import engine_from_config, pool
+
 # Look for .env in the current directory OR the parent directory
 env_path = Path('.') / '.env'
 if not env_path.exists():
@@ -10,5 +13,45 @@ if not env_path.exists():
 
 load_dotenv(dotenv_path=env_path)
 
-# DEBUG: Let's see if Pydantic can see it now
-print(f"DEBUG: Checking for key in environment: {'FOUND' if os.getenv('OPEN_ROUTER_KEY') else 'NOT FOUND'}")
\ No newline at end of file
+# Imported after the .env is loaded so Settings() can see it
+from config import settings
+from database import Base
+import auth.models  # noqa: F401 - registers the tables on Base.metadata
+
+config = context.config
+config.set_main_option("sqlalchemy.url", settings.database_url.replace("%", "%%"))
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline() -> None:
+    context.configure(
+        url=config.get_main_option("sqlalchemy.url"),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    connectable = engine_from_config(
+        config.get_section(config.config_ini_section, {}),
+        prefix="sqlalchemy.",
+        poolclass=pool.NullPool,
+    )
+    with connectable.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata, render_as_batch=True)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,24 @@
+"""Add composite (user_id, date) index on Todo for calendar range queries
+
+Revision ID: 50
+Revises: 49
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '50'
+down_revision = '49'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_todo_user_id_date', 'Todo', ['user_id', 'date'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_todo_user_id_date', table_name='Todo')
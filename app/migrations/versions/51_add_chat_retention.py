@@ -0,0 +1,54 @@
+"""Add chat retention settings, session summary and message archive table
+
+Revision ID: 51
+Revises: 50
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '51'
+down_revision = '50'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('chat_sessions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('retention_max_age_days', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('retention_max_messages', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('summary', sa.TEXT(), nullable=True))
+
+    op.create_table(
+        'chat_message_archives',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('session_id', sa.Integer(), sa.ForeignKey('chat_sessions.id')),
+        sa.Column('first_message_id', sa.Integer()),
+        sa.Column('last_message_id', sa.Integer()),
+        sa.Column('first_timestamp', sa.DateTime()),
+        sa.Column('last_timestamp', sa.DateTime()),
+        sa.Column('message_count', sa.Integer()),
+        sa.Column('raw_bytes', sa.Integer()),
+        sa.Column('payload', sa.LargeBinary()),
+        sa.Column('archived_at', sa.DateTime()),
+    )
+    op.create_index('ix_chat_message_archives_id', 'chat_message_archives', ['id'])
+    op.create_index('ix_chat_message_archives_session_id', 'chat_message_archives', ['session_id'])
+
+    # Compaction and history loading both range-scan a session's messages by id
+    op.create_index('ix_chat_messages_session_id_id', 'chat_messages', ['session_id', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_chat_messages_session_id_id', table_name='chat_messages')
+    op.drop_index('ix_chat_message_archives_session_id', table_name='chat_message_archives')
+    op.drop_index('ix_chat_message_archives_id', table_name='chat_message_archives')
+    op.drop_table('chat_message_archives')
+
+    with op.batch_alter_table('chat_sessions', schema=None) as batch_op:
+        batch_op.drop_column('summary')
+        batch_op.drop_column('retention_max_messages')
+        batch_op.drop_column('retention_max_age_days')
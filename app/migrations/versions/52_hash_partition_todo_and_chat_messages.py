@@ -0,0 +1,160 @@
+"""Hash-partition Todo by user_id and chat_messages by session_id (Postgres)
+
+Online conversion: a partitioned copy is created and kept in sync with a
+trigger while existing rows are backfilled in small committed batches, then
+the tables are swapped under a brief ACCESS EXCLUSIVE lock. Other dialects
+are left untouched.
+
+Rows without a partition key (user_id / session_id NULL) cannot go into the
+partitioned table, both columns become NOT NULL. They are copied to a side
+table (Todo_without_user_id / chat_messages_without_session_id) at the swap,
+and the count is logged.
+
+Revision ID: 52
+Revises: 51
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '52'
+down_revision = '51'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+PARTITIONS = 16
+BACKFILL_BATCH = 20000
+
+# table -> (partition key, foreign key target, secondary indexes as name: columns)
+TABLES = {
+    'Todo': ('user_id', 'users(id)', {'ix_Todo_id': ['id'], 'ix_todo_user_id_date': ['user_id', 'date']}),
+    'chat_messages': ('session_id', 'chat_sessions(id)', {
+        'ix_chat_messages_id': ['id'], 'ix_chat_messages_session_id_id': ['session_id', 'id'],
+    }),
+}
+
+
+def _q(name):
+    return '"%s"' % name
+
+
+def _execute(sql, **params):
+    op.get_bind().execute(sa.text(sql), params)
+
+
+def _partition(table, key, references, indexes):
+    new, old = f'{table}_partitioned', f'{table}_unpartitioned'
+    sequence = op.get_bind().execute(
+        sa.text("SELECT pg_get_serial_sequence(:table, 'id')"), {'table': _q(table)}
+    ).scalar()
+
+    # 1. Empty partitioned copy, sharing the id sequence
+    with op.get_context().autocommit_block():
+        _execute(f'CREATE TABLE {_q(new)} (LIKE {_q(table)} INCLUDING DEFAULTS) PARTITION BY HASH ({key})')
+        _execute(f'ALTER TABLE {_q(new)} ALTER COLUMN {key} SET NOT NULL')
+        _execute(f'ALTER TABLE {_q(new)} ADD PRIMARY KEY (id, {key})')
+        _execute(f'ALTER TABLE {_q(new)} ADD FOREIGN KEY ({key}) REFERENCES {references}')
+        for remainder in range(PARTITIONS):
+            _execute(
+                f'CREATE TABLE {_q(f"{table}_p{remainder}")} PARTITION OF {_q(new)} '
+                f'FOR VALUES WITH (MODULUS {PARTITIONS}, REMAINDER {remainder})'
+            )
+        for name, columns in indexes.items():
+            _execute(f'CREATE INDEX {_q(name + "_new")} ON {_q(new)} ({", ".join(columns)})')
+
+        # 2. Mirror every change made to the live table from now on
+        _execute(f'''
+            CREATE FUNCTION {_q(table + "_mirror")}() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                    DELETE FROM {_q(new)} WHERE id = OLD.id AND {key} = OLD.{key};
+                END IF;
+                IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.{key} IS NOT NULL THEN
+                    INSERT INTO {_q(new)} SELECT NEW.* ON CONFLICT DO NOTHING;
+                END IF;
+                RETURN NULL;
+            END $$ LANGUAGE plpgsql
+        ''')
+        _execute(
+            f'CREATE TRIGGER {_q(table + "_mirror")} AFTER INSERT OR UPDATE OR DELETE ON {_q(table)} '
+            f'FOR EACH ROW EXECUTE FUNCTION {_q(table + "_mirror")}()'
+        )
+
+        # 3. Backfill in id ranges, one short transaction each. FOR SHARE
+        # waits for in-flight deletes so they are not resurrected.
+        low, high = op.get_bind().execute(sa.text(f'SELECT MIN(id), MAX(id) FROM {_q(table)}')).one()
+        start = low or 0
+        while high is not None and start <= high:
+            _execute(f'''
+                WITH batch AS (
+                    SELECT * FROM {_q(table)}
+                    WHERE id >= :start AND id < :stop AND {key} IS NOT NULL
+                    FOR SHARE
+                )
+                INSERT INTO {_q(new)} SELECT * FROM batch ON CONFLICT DO NOTHING
+            ''', start=start, stop=start + BACKFILL_BATCH)
+            start += BACKFILL_BATCH
+
+    # 4. Swap (runs in the migration transaction, holds the lock briefly)
+    _execute(f'LOCK TABLE {_q(table)} IN ACCESS EXCLUSIVE MODE')
+    orphans = op.get_bind().execute(
+        sa.text(f'SELECT COUNT(*) FROM {_q(table)} WHERE {key} IS NULL')
+    ).scalar()
+    if orphans:
+        side = f'{table}_without_{key}'
+        _execute(f'CREATE TABLE {_q(side)} AS SELECT * FROM {_q(table)} WHERE {key} IS NULL')
+        logger.warning('%s: %d rows with NULL %s kept in %s, not partitioned', table, orphans, key, side)
+    _execute(f'DROP TRIGGER {_q(table + "_mirror")} ON {_q(table)}')
+    _execute(f'DROP FUNCTION {_q(table + "_mirror")}()')
+    _execute(f'ALTER TABLE {_q(table)} RENAME TO {_q(old)}')
+    _execute(f'ALTER TABLE {_q(new)} RENAME TO {_q(table)}')
+    _execute(f'ALTER SEQUENCE {sequence} OWNED BY {_q(table)}.id')
+    _execute(f'DROP TABLE {_q(old)}')
+    _execute(f'ALTER TABLE {_q(table)} RENAME CONSTRAINT {_q(new + "_pkey")} TO {_q(table + "_pkey")}')
+    for name in indexes:
+        _execute(f'ALTER INDEX {_q(name + "_new")} RENAME TO {_q(name)}')
+
+
+def _unpartition(table, key, references, indexes):
+    # Offline reverse: copy everything back into a plain table
+    new, old = f'{table}_plain', f'{table}_partitioned'
+    sequence = op.get_bind().execute(
+        sa.text("SELECT pg_get_serial_sequence(:table, 'id')"), {'table': _q(table)}
+    ).scalar()
+    _execute(f'CREATE TABLE {_q(new)} (LIKE {_q(table)} INCLUDING DEFAULTS)')
+    _execute(f'ALTER TABLE {_q(new)} ALTER COLUMN {key} DROP NOT NULL')
+    _execute(f'ALTER TABLE {_q(new)} ADD PRIMARY KEY (id)')
+    _execute(f'ALTER TABLE {_q(new)} ADD FOREIGN KEY ({key}) REFERENCES {references}')
+    _execute(f'INSERT INTO {_q(new)} SELECT * FROM {_q(table)}')
+    side = f'{table}_without_{key}'
+    if op.get_bind().execute(sa.text('SELECT to_regclass(:side)'), {'side': _q(side)}).scalar():
+        _execute(f'INSERT INTO {_q(new)} SELECT * FROM {_q(side)}')
+        _execute(f'DROP TABLE {_q(side)}')
+    _execute(f'ALTER TABLE {_q(table)} RENAME TO {_q(old)}')
+    _execute(f'ALTER TABLE {_q(new)} RENAME TO {_q(table)}')
+    _execute(f'ALTER SEQUENCE {sequence} OWNED BY {_q(table)}.id')
+    _execute(f'DROP TABLE {_q(old)}')
+    _execute(f'ALTER TABLE {_q(table)} RENAME CONSTRAINT {_q(new + "_pkey")} TO {_q(table + "_pkey")}')
+    for name, columns in indexes.items():
+        _execute(f'CREATE INDEX {_q(name)} ON {_q(table)} ({", ".join(columns)})')
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for table, (key, references, indexes) in TABLES.items():
+        _partition(table, key, references, indexes)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for table, (key, references, indexes) in TABLES.items():
+        _unpartition(table, key, references, indexes)
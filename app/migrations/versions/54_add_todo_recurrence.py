@@ -0,0 +1,42 @@
+"""Add recurring todos: Todo.recurrence and sparse todo_occurrences overrides
+
+Revision ID: 54
+Revises: 53
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '54'
+down_revision = '53'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # A nullable column without default: metadata-only on Postgres, and
+    # ALTER on the partitioned parent reaches every partition
+    with op.batch_alter_table('Todo', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('recurrence', sa.String(), nullable=True))
+
+    op.create_table(
+        'todo_occurrences',
+        sa.Column('todo_id', sa.Integer(), primary_key=True),
+        sa.Column('occurrence_date', sa.Date(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('notes', sa.TEXT(), nullable=True),
+        sa.Column('priority', sa.String(), nullable=True),
+        sa.Column('skipped', sa.Boolean(), nullable=False, server_default=sa.false()),
+    )
+    op.create_index('ix_todo_occurrences_user_id_date', 'todo_occurrences', ['user_id', 'occurrence_date'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_todo_occurrences_user_id_date', table_name='todo_occurrences')
+    op.drop_table('todo_occurrences')
+    with op.batch_alter_table('Todo', schema=None) as batch_op:
+        batch_op.drop_column('recurrence')
@@ -0,0 +1,81 @@
+"""Read-your-writes pinning that holds across workers.
+
+database.pin_to_primary() remembers a write in the worker that served it.
+The next read often lands on another worker (uvicorn --workers N), so the
+pin also goes back to the client as a short-lived signed cookie. Any worker
+honours it through database.is_pinned() for read_your_writes_seconds.
+"""
+import hashlib
+import hmac
+import time
+from http.cookies import SimpleCookie
+from typing import Optional
+
+from starlette.datastructures import MutableHeaders
+
+from config import settings
+from database import replica_engine, request_pins
+
+COOKIE_NAME = "rw_pin"
+
+
+def _sign(payload: str) -> str:
+    return hmac.new(settings.jwt_secret_key.encode(), payload.encode(), hashlib.sha256).hexdigest()[:32]
+
+
+def make_pin(user_id: int, now: Optional[float] = None) -> str:
+    deadline = int((now or time.time()) + settings.read_your_writes_seconds)
+    payload = f"{user_id}.{deadline}"
+    return f"{payload}.{_sign(payload)}"
+
+
+def read_pin(value: str, now: Optional[float] = None) -> Optional[int]:
+    """The user id of a valid, unexpired pin, else None."""
+    payload, _, signature = value.rpartition(".")
+    user_id, _, deadline = payload.partition(".")
+    if not hmac.compare_digest(signature, _sign(payload)):
+        return None
+    try:
+        if int(deadline) < (now or time.time()):
+            return None
+        return int(user_id)
+    except ValueError:
+        return None
+
+
+def _cookie_pin(scope) -> Optional[int]:
+    for name, value in scope["headers"]:
+        if name == b"cookie":
+            morsel = SimpleCookie(value.decode("latin-1")).get(COOKIE_NAME)
+            if morsel is not None:
+                return read_pin(morsel.value)
+    return None
+
+
+class ReadYourWritesMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        # Only a replica can lag; without one there is nothing to pin
+        if scope["type"] != "http" or replica_engine is None:
+            await self.app(scope, receive, send)
+            return
+
+        pinned = _cookie_pin(scope)
+        pins = {"pinned": {pinned} if pinned is not None else set(), "wrote": None}
+        token = request_pins.set(pins)
+
+        async def send_with_pin(message):
+            if message["type"] == "http.response.start" and pins["wrote"] is not None:
+                headers = MutableHeaders(scope=message)
+                headers.append("set-cookie", (
+                    f"{COOKIE_NAME}={make_pin(pins['wrote'])}; Max-Age={int(settings.read_your_writes_seconds) + 1}; "
+                    "Path=/; HttpOnly; SameSite=Lax"
+                ))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_pin)
+        finally:
+            request_pins.reset(token)
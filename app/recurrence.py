@@ -0,0 +1,310 @@
+"""Recurring todos: one TODO row with an RRULE-style rule, expanded lazily.
+
+A series keeps its first occurrence in `TODO.date` and its rule in
+`TODO.recurrence`. Occurrences are generated only for the window a query
+asks for, and `todo_occurrences` holds overrides (status, notes, priority,
+skipped) just for the occurrences that were changed, so storage and
+expansion cost no longer grow with the horizon.
+
+Supported subset of RFC 5545 RRULE:
+
+    FREQ=DAILY|WEEKLY|MONTHLY|YEARLY  (required)
+    INTERVAL=n  COUNT=n  UNTIL=YYYY-MM-DD (or YYYYMMDD)
+    BYDAY=MO,WE,FR  (DAILY and WEEKLY only)
+
+Like RFC 5545, a monthly/yearly rule skips months or years without the
+start day (the 31st, Feb 29th).
+"""
+import calendar
+import logging
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from auth.models import TODO, TodoOccurrence
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY", "YEARLY")
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+MAX_COUNT = 1000
+MAX_INTERVAL = 1000
+MIN_COLLAPSE = 3  # evenly spaced duplicates needed before bulk creation stores a series
+OVERRIDE_FIELDS = ("status", "notes", "priority", "skipped")
+
+
+class Rule:
+    __slots__ = ("freq", "interval", "count", "until", "byday")
+
+    def __init__(self, freq: str, interval: int = 1, count: Optional[int] = None,
+                 until: Optional[date] = None, byday: Sequence[int] = ()):
+        self.freq = freq
+        self.interval = interval
+        self.count = count
+        self.until = until
+        self.byday = tuple(sorted(set(byday)))
+
+    def __str__(self) -> str:
+        parts = [f"FREQ={self.freq}"]
+        if self.interval != 1:
+            parts.append(f"INTERVAL={self.interval}")
+        if self.count is not None:
+            parts.append(f"COUNT={self.count}")
+        if self.until is not None:
+            parts.append(f"UNTIL={self.until.isoformat()}")
+        if self.byday:
+            parts.append("BYDAY=" + ",".join(WEEKDAYS[day] for day in self.byday))
+        return ";".join(parts)
+
+
+def _parse_until(value: str) -> date:
+    value = value.split("T", 1)[0]
+    if len(value) == 8 and value.isdigit():
+        return date(int(value[:4]), int(value[4:6]), int(value[6:]))
+    return date.fromisoformat(value)
+
+
+def parse_rule(text: str) -> Rule:
+    """Parse and validate a rule, raising ValueError with a readable message."""
+    fields = {}
+    body = text.strip()
+    if body.upper().startswith("RRULE:"):
+        body = body[6:]
+    for part in filter(None, body.split(";")):
+        name, sep, value = part.partition("=")
+        if not sep or not value:
+            raise ValueError(f"Malformed recurrence part '{part}'")
+        fields[name.strip().upper()] = value.strip().upper()
+
+    freq = fields.pop("FREQ", None)
+    if freq not in FREQUENCIES:
+        raise ValueError(f"FREQ must be one of {', '.join(FREQUENCIES)}")
+    try:
+        interval = int(fields.pop("INTERVAL", 1))
+        count = int(fields["COUNT"]) if "COUNT" in fields else None
+        until = _parse_until(fields["UNTIL"]) if "UNTIL" in fields else None
+    except ValueError:
+        raise ValueError("INTERVAL and COUNT must be integers, UNTIL a date")
+    fields.pop("COUNT", None)
+    fields.pop("UNTIL", None)
+    if not 1 <= interval <= MAX_INTERVAL:
+        raise ValueError(f"INTERVAL must be between 1 and {MAX_INTERVAL}")
+    if count is not None and not 1 <= count <= MAX_COUNT:
+        raise ValueError(f"COUNT must be between 1 and {MAX_COUNT}")
+    if count is not None and until is not None:
+        raise ValueError("COUNT and UNTIL cannot be combined")
+
+    byday = []
+    if "BYDAY" in fields:
+        if freq not in ("DAILY", "WEEKLY"):
+            raise ValueError("BYDAY is only supported with FREQ=DAILY or WEEKLY")
+        for code in fields.pop("BYDAY").split(","):
+            if code not in WEEKDAYS:
+                raise ValueError(f"Unknown BYDAY value '{code}'")
+            byday.append(WEEKDAYS.index(code))
+    if fields:
+        raise ValueError(f"Unsupported recurrence parts: {', '.join(sorted(fields))}")
+    return Rule(freq, interval, count, until, byday)
+
+
+def normalize_rule(text: Optional[str]) -> Optional[str]:
+    """Canonical form of a rule for storage, None for an empty one."""
+    if text is None or not text.strip():
+        return None
+    return str(parse_rule(text))
+
+
+def _add_months(start: date, months: int) -> Optional[date]:
+    month_index = start.month - 1 + months
+    year, month = start.year + month_index // 12, month_index % 12 + 1
+    if start.day > calendar.monthrange(year, month)[1]:
+        return None
+    return date(year, month, start.day)
+
+
+def _period(rule: Rule, start: date, k: int):
+    """First day of the k-th period of the series and its candidate dates."""
+    if rule.freq == "DAILY":
+        day = start + timedelta(days=k * rule.interval)
+        return day, [day] if not rule.byday or day.weekday() in rule.byday else []
+    if rule.freq == "WEEKLY":
+        monday = start - timedelta(days=start.weekday()) + timedelta(weeks=k * rule.interval)
+        return monday, [monday + timedelta(days=d) for d in (rule.byday or (start.weekday(),))]
+    if rule.freq == "MONTHLY":
+        first = date(start.year + (start.month - 1 + k * rule.interval) // 12,
+                     (start.month - 1 + k * rule.interval) % 12 + 1, 1)
+        day = _add_months(start, k * rule.interval)
+        return first, [day] if day else []
+    year = start.year + k * rule.interval
+    day = _add_months(start, k * rule.interval * 12)
+    return date(year, start.month, 1), [day] if day else []
+
+
+def _first_period(rule: Rule, start: date, window_start: date) -> int:
+    """Index of the period containing window_start, skipping the ones before it."""
+    if rule.count is not None or window_start <= start:
+        # COUNT needs every earlier occurrence numbered (bounded by MAX_COUNT)
+        return 0
+    if rule.freq == "DAILY":
+        return (window_start - start).days // rule.interval
+    if rule.freq == "WEEKLY":
+        monday = start - timedelta(days=start.weekday())
+        return (window_start - monday).days // (7 * rule.interval)
+    if rule.freq == "MONTHLY":
+        months = (window_start.year - start.year) * 12 + window_start.month - start.month
+        return months // rule.interval
+    return (window_start.year - start.year) // rule.interval
+
+
+def occurrences(rule: Rule, start: date, window_start: date, window_end: date) -> Iterator[date]:
+    """Occurrence dates of a series starting on `start` within [window_start, window_end).
+
+    The work done is proportional to the window, not to how far the series
+    runs (COUNT rules excepted, which are capped at MAX_COUNT).
+    """
+    numbered = 0
+    k = _first_period(rule, start, window_start)
+    while True:
+        first_day, days = _period(rule, start, k)
+        if first_day >= window_end or (rule.until is not None and first_day > rule.until):
+            return
+        for day in days:
+            if day < start:
+                continue
+            if rule.until is not None and day > rule.until:
+                return
+            numbered += 1
+            if rule.count is not None and numbered > rule.count:
+                return
+            if day >= window_end:
+                return
+            if day >= window_start:
+                yield day
+        k += 1
+
+
+def is_occurrence(rule: Rule, start: date, day: date) -> bool:
+    return any(True for _ in occurrences(rule, start, day, day + timedelta(days=1)))
+
+
+def collapse(days: Sequence[date]) -> Optional[Rule]:
+    """A rule generating exactly `days`, when they are evenly spaced by whole days.
+
+    Repeated days are not collapsible: a rule yields each day once, so the
+    extra tasks would be lost.
+    """
+    if len(set(days)) != len(days):
+        return None
+    days = sorted(days)
+    if len(days) < MIN_COLLAPSE or len(days) > MAX_COUNT:
+        return None
+    step = (days[1] - days[0]).days
+    if any((b - a).days != step for a, b in zip(days, days[1:])):
+        return None
+    if step % 7 == 0:
+        return Rule("WEEKLY", step // 7, count=len(days))
+    return Rule("DAILY", step, count=len(days))
+
+
+def default_window(today: Optional[date] = None) -> Tuple[date, date]:
+    """The [start, end) range expanded when a list request gives none."""
+    today = today or date.today()
+    return (
+        today - timedelta(days=settings.recurrence_window_past_days),
+        today + timedelta(days=settings.recurrence_window_future_days + 1),
+    )
+
+
+def request_window(date_from: Optional[date], date_to: Optional[date]) -> Tuple[date, date]:
+    """The [start, end) range for inclusive from/to bounds, either of which may be missing.
+
+    A missing bound is derived from the given one (recurrence_window_future_days
+    away), not from today.
+    """
+    span = timedelta(days=settings.recurrence_window_future_days)
+    if date_from is None and date_to is None:
+        return default_window()
+    if date_to is None:
+        return date_from, date_from + span + timedelta(days=1)
+    if date_from is None:
+        return date_to - span, date_to + timedelta(days=1)
+    return date_from, date_to + timedelta(days=1)
+
+
+def override_occurrence(db: Session, todo: TODO, occurrence_date: date, changes: Dict) -> None:
+    """Record `changes` for a single occurrence of the series `todo` (not committed)."""
+    unsupported = set(changes) - set(OVERRIDE_FIELDS)
+    if unsupported:
+        raise ValueError(
+            f"Only {', '.join(OVERRIDE_FIELDS)} can be changed for a single occurrence, not {', '.join(sorted(unsupported))}"
+        )
+    if not todo.recurrence or not is_occurrence(parse_rule(todo.recurrence), todo.date.date(), occurrence_date):
+        raise ValueError(f"{occurrence_date} is not an occurrence of todo {todo.id}")
+
+    override = db.query(TodoOccurrence).filter(
+        TodoOccurrence.todo_id == todo.id, TodoOccurrence.occurrence_date == occurrence_date
+    ).first()
+    if override is None:
+        override = TodoOccurrence(todo_id=todo.id, occurrence_date=occurrence_date, user_id=todo.user_id, skipped=False)
+        db.add(override)
+    for field, value in changes.items():
+        setattr(override, field, bool(value) if field == "skipped" else value)
+
+
+def delete_overrides(db: Session, user_id: int, todo_ids: Sequence[int]) -> None:
+    db.query(TodoOccurrence).filter(
+        TodoOccurrence.user_id == user_id, TodoOccurrence.todo_id.in_(todo_ids)
+    ).delete(synchronize_session=False)
+
+
+def expand_series(db: Session, user_id: int, window_start: date, window_end: date) -> List[Dict]:
+    """Occurrences of the user's recurring todos in [window_start, window_end).
+
+    Overrides are applied and skipped occurrences left out. Each occurrence
+    looks like a todo row (its series id, the occurrence's date and time)
+    plus `recurrence` and `occurrence_date`.
+    """
+    window_end_at = datetime.combine(window_end, datetime.min.time())
+    series = db.query(
+        TODO.id, TODO.notes, TODO.date, TODO.status, TODO.priority, TODO.user_id, TODO.recurrence
+    ).filter(
+        TODO.user_id == user_id, TODO.recurrence.isnot(None), TODO.date < window_end_at
+    ).order_by(TODO.id).all()
+    if not series:
+        return []
+
+    overrides = {
+        (row.todo_id, row.occurrence_date): row
+        for row in db.query(TodoOccurrence).filter(
+            TodoOccurrence.user_id == user_id,
+            TodoOccurrence.occurrence_date >= window_start,
+            TodoOccurrence.occurrence_date < window_end,
+        )
+    }
+
+    expanded = []
+    for todo in series:
+        try:
+            rule = parse_rule(todo.recurrence)
+        except ValueError:
+            logger.warning("todo %s has an invalid recurrence %r", todo.id, todo.recurrence)
+            continue
+        for occurrence_date in occurrences(rule, todo.date.date(), window_start, window_end):
+            override = overrides.get((todo.id, occurrence_date))
+            if override is not None and override.skipped:
+                continue
+            expanded.append({
+                "id": todo.id,
+                "notes": override.notes if override is not None and override.notes is not None else todo.notes,
+                "date": datetime.combine(occurrence_date, todo.date.time()),
+                "status": override.status if override is not None and override.status is not None else todo.status,
+                "priority": (
+                    override.priority if override is not None and override.priority is not None else todo.priority
+                ),
+                "user_id": todo.user_id,
+                "recurrence": todo.recurrence,
+                "occurrence_date": occurrence_date,
+            })
+    return expanded
@@ -0,0 +1,222 @@
+"""Generate and bulk-load synthetic users, todos and chat history.
+
+Data is deterministic for a given --seed and --start-date, with skewed
+per-user counts, dates spread around the start date and a realistic
+status/priority mix:
+
+    python seed.py --users 5000 --todos 2000000 --sessions 50000 --messages 2000000
+
+Ids start at --id-base in every table (usernames include the user id), so
+the target tables must not hold ids at or above it.
+
+Rows are written with COPY on Postgres and with one relaxed-pragma
+transaction per table on SQLite. Every user shares one pre-hashed password.
+"""
+import argparse
+import bisect
+import itertools
+import random
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Iterator, List, Sequence, Tuple
+
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.pool import NullPool
+
+from auth.jwt import hash_password
+from auth.models import User, TODO, ChatSession, ChatMessage
+from bulk_load import insert_tuples
+from config import settings
+
+STATUSES = ["Pending", "In Progress", "Completed", "Cancelled"]
+PRIORITIES = ["Low", "Medium", "High"]
+# Cumulative weights; tasks in the past are mostly done
+PAST_STATUS_WEIGHTS = [0.15, 0.25, 0.92, 1.0]
+FUTURE_STATUS_WEIGHTS = [0.70, 0.90, 0.97, 1.0]
+PRIORITY_WEIGHTS = [0.30, 0.80, 1.0]
+DEFAULT_START_DATE = "2026-01-01"
+
+VERBS = ["Review", "Write", "Call", "Email", "Prepare", "Fix", "Plan", "Buy", "Schedule", "Clean",
+         "Update", "Submit", "Read", "Book", "Pay", "Organize", "Test", "Deploy", "Draft", "Renew"]
+OBJECTS = ["quarterly report", "dentist appointment", "groceries", "project proposal", "team meeting",
+           "car insurance", "blog post", "tax documents", "birthday gift", "flight tickets",
+           "release notes", "garage", "invoice", "presentation slides", "gym membership",
+           "design review", "pull request", "budget sheet", "vet visit", "weekly standup"]
+USER_LINES = ["What do I have today?", "Add a task to {o} tomorrow", "Mark the {o} task as done",
+              "Show my high priority tasks", "Move {o} to next week", "Delete the {o} task"]
+NOTES = [f"{verb} {obj}" for verb in VERBS for obj in OBJECTS]
+ASSISTANT_LINES = ["Done! I've added '{v} {o}'.", "You have 3 tasks today.", "I've updated the task.",
+                   "Here are your high priority tasks.", "The task has been deleted."]
+
+
+def skewed_counts(rng: random.Random, n: int, total: int, alpha: float) -> List[int]:
+    """Split `total` over `n` owners with Pareto-distributed weights (a few heavy tenants)."""
+    if n == 0:
+        return []
+    weights = [rng.paretovariate(alpha) for _ in range(n)]
+    scale = total / sum(weights)
+    counts = [int(weight * scale) for weight in weights]
+    for i in rng.sample(range(n), total - sum(counts)):
+        counts[i] += 1
+    return counts
+
+
+def _pick(rng: random.Random, values: Sequence[str], cum_weights: Sequence[float]) -> str:
+    return values[bisect.bisect(cum_weights, rng.random())]
+
+
+def generate_users(first_id: int, count: int, prefix: str, hashed_password: str) -> Iterator[Tuple]:
+    for user_id in range(first_id, first_id + count):
+        username = f"{prefix}{user_id}"
+        yield (user_id, username, f"{username}@example.com", hashed_password, True)
+
+
+def generate_todos(rng: random.Random, first_id: int, user_ids: Sequence[int], counts: Sequence[int],
+                   today: datetime, spread_days: int) -> Iterator[Tuple]:
+    # Hot loop: precomputed choices and bound methods keep generation cheap
+    todo_id = first_id
+    random_ = rng.random
+    gauss = rng.gauss
+    hours = [timedelta(hours=hour) for hour in range(7, 22)]
+    for user_id, count in zip(user_ids, counts):
+        for _ in range(count):
+            offset = int(max(-365, min(365, gauss(0, spread_days))))
+            date = today + timedelta(days=offset) + hours[int(random_() * len(hours))]
+            weights = PAST_STATUS_WEIGHTS if offset < 0 else FUTURE_STATUS_WEIGHTS
+            yield (todo_id, user_id, NOTES[int(random_() * len(NOTES))], date,
+                   _pick(rng, STATUSES, weights), _pick(rng, PRIORITIES, PRIORITY_WEIGHTS))
+            todo_id += 1
+
+
+def generate_sessions(rng: random.Random, first_id: int, user_ids: Sequence[int], counts: Sequence[int],
+                      today: datetime, created_at: List[datetime]) -> Iterator[Tuple]:
+    session_id = first_id
+    for user_id, count in zip(user_ids, counts):
+        for _ in range(count):
+            started = today - timedelta(days=rng.randrange(180), minutes=rng.randrange(24 * 60))
+            created_at.append(started)
+            yield (session_id, user_id, str(uuid.UUID(int=rng.getrandbits(128), version=4)), started)
+            session_id += 1
+
+
+def generate_messages(rng: random.Random, first_id: int, session_ids: Sequence[int], counts: Sequence[int],
+                      created_at: Sequence[datetime]) -> Iterator[Tuple]:
+    message_id = first_id
+    for session_id, count, started in zip(session_ids, counts, created_at):
+        timestamp = started
+        for i in range(count):
+            timestamp += timedelta(seconds=rng.randrange(5, 600))
+            obj, verb = rng.choice(OBJECTS), rng.choice(VERBS)
+            if i % 2 == 0:
+                sender, message, tool = "user", rng.choice(USER_LINES).format(o=obj), None
+            else:
+                sender, message = "assistant", rng.choice(ASSISTANT_LINES).format(v=verb, o=obj)
+                tool = rng.choice([None, None, "get_todos", "create_todo", "edit_todo"])
+            yield (message_id, session_id, sender, message, timestamp, tool)
+            message_id += 1
+
+
+def _batched(rows: Iterator[Tuple], size: int) -> Iterator[List[Tuple]]:
+    while True:
+        batch = list(itertools.islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def load(connection, table, columns: Sequence[str], rows: Iterator[Tuple], batch_size: int) -> int:
+    started = time.perf_counter()
+    total = 0
+    for batch in _batched(rows, batch_size):
+        total += insert_tuples(connection, table, columns, batch)
+    elapsed = time.perf_counter() - started
+    print(f"{table.name}: {total:,} rows in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} rows/s)", flush=True)
+    return total
+
+
+def _check_free(connection, tables, id_base: int) -> None:
+    for table in tables:
+        if connection.execute(select(func.count()).where(table.c.id >= id_base)).scalar():
+            raise SystemExit(f"{table.name} already has ids >= {id_base}, pass a higher --id-base")
+
+
+def _relax_sqlite(connection) -> None:
+    # Only for this throwaway loader connection: durability is traded for speed
+    connection.exec_driver_sql("PRAGMA synchronous=OFF")
+    connection.exec_driver_sql("PRAGMA temp_store=MEMORY")
+    connection.exec_driver_sql("PRAGMA cache_size=-262144")
+
+
+def _reset_sequences(connection, tables) -> None:
+    # Explicit ids bypass the serial sequences, move them past the new rows
+    preparer = connection.dialect.identifier_preparer
+    for table in tables:
+        name = preparer.format_table(table)
+        connection.execute(text(
+            f"SELECT setval(pg_get_serial_sequence(:name, 'id'), (SELECT COALESCE(MAX(id), 1) FROM {name}))"
+        ), {"name": name})
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--todos", type=int, default=500_000)
+    parser.add_argument("--sessions", type=int, default=20_000)
+    parser.add_argument("--messages", type=int, default=400_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--prefix", default="seed_user_", help="username prefix, must be unused in the target DB")
+    parser.add_argument("--password", default="password", help="shared plain password for every generated user")
+    parser.add_argument("--start-date", type=date.fromisoformat, default=DEFAULT_START_DATE,
+                        help="YYYY-MM-DD the generated dates are spread around")
+    parser.add_argument("--spread-days", type=int, default=60, help="std-dev of todo dates around --start-date")
+    parser.add_argument("--skew", type=float, default=1.2, help="Pareto alpha, lower means heavier tenants")
+    parser.add_argument("--id-base", type=int, default=1, help="first id in every table")
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    parser.add_argument("--database-url", default=settings.database_url)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    today = datetime.combine(args.start_date, datetime.min.time())
+    hashed_password = hash_password(args.password)
+
+    engine = create_engine(args.database_url, poolclass=NullPool)
+    users, todos, sessions, messages = (
+        User.__table__, TODO.__table__, ChatSession.__table__, ChatMessage.__table__
+    )
+    started = time.perf_counter()
+    with engine.begin() as connection:
+        if connection.dialect.name == "sqlite":
+            _relax_sqlite(connection)
+        _check_free(connection, [users, todos, sessions, messages], args.id_base)
+
+        first_user = first_session = args.id_base
+        user_ids = range(first_user, first_user + args.users)
+        todo_counts = skewed_counts(rng, args.users, args.todos, args.skew)
+        session_counts = skewed_counts(rng, args.users, args.sessions, args.skew)
+        message_counts = skewed_counts(rng, args.sessions, args.messages, args.skew + 0.5)
+        session_created_at = []
+
+        total = load(connection, users, ["id", "username", "email", "hashed_password", "is_active"],
+                     generate_users(first_user, args.users, args.prefix, hashed_password), args.batch_size)
+        total += load(connection, todos, ["id", "user_id", "notes", "date", "status", "priority"],
+                      generate_todos(rng, args.id_base, user_ids, todo_counts, today, args.spread_days),
+                      args.batch_size)
+        total += load(connection, sessions, ["id", "user_id", "session_uuid", "created_at"],
+                      generate_sessions(rng, first_session, user_ids, session_counts, today, session_created_at),
+                      args.batch_size)
+        total += load(connection, messages, ["id", "session_id", "sender", "message", "timestamp", "tool_used"],
+                      generate_messages(rng, args.id_base,
+                                        range(first_session, first_session + args.sessions),
+                                        message_counts, session_created_at),
+                      args.batch_size)
+
+        if connection.dialect.name == "postgresql":
+            _reset_sequences(connection, [users, todos, sessions, messages])
+
+    elapsed = time.perf_counter() - started
+    print(f"total: {total:,} rows in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
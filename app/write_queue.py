@@ -0,0 +1,112 @@
+"""Group commit for small writes (chat messages and the like).
+
+In SQLite mode only one connection can write and every commit is a WAL
+append, so jobs are handed to a single writer thread. It applies whatever
+has queued up since its last commit in one transaction, each job under its
+own SAVEPOINT so a failing job does not take the rest of the batch down.
+On other databases a job simply runs in its own session.
+
+A job is a callable taking the session; it should return plain values,
+not ORM objects (those are detached once the batch commits).
+"""
+import asyncio
+import logging
+import queue
+from concurrent.futures import Future
+from threading import Lock, Thread
+from typing import Any, Callable, Optional
+
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from config import settings
+from database import SessionLocal, sqlite_mode
+
+logger = logging.getLogger(__name__)
+
+Job = Callable[[Session], Any]
+
+
+class WriteQueue:
+    def __init__(self, max_batch: int):
+        self.max_batch = max_batch
+        self._jobs = queue.SimpleQueue()
+        self._thread = None
+        self._start_lock = Lock()
+
+    def submit(self, job: Job) -> Future:
+        future = Future()
+        self._jobs.put((job, future))
+        if self._thread is None:
+            self._start()
+        return future
+
+    def _start(self) -> None:
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = Thread(target=self._run, name="write-queue", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            # Block for the first job, then take whatever piled up meanwhile:
+            # a lone write is not delayed, a burst shares one commit
+            batch = [self._jobs.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._jobs.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._apply(batch)
+            except Exception:
+                logger.exception("write queue batch failed")
+
+    def _apply(self, batch) -> None:
+        db = SessionLocal(expire_on_commit=False)
+        done = []
+        try:
+            for job, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    with db.begin_nested():
+                        result = job(db)
+                except Exception as exc:
+                    future.set_exception(exc)
+                else:
+                    done.append((future, result))
+            db.commit()
+        except Exception as exc:
+            db.rollback()
+            for future, _ in done:
+                future.set_exception(exc)
+            raise
+        finally:
+            db.close()
+        for future, result in done:
+            future.set_result(result)
+
+
+write_queue = WriteQueue(settings.sqlite_write_batch_size)
+
+
+def _run_now(job: Job, user_id: Optional[int]):
+    db = SessionLocal(info={"user_id": user_id}, expire_on_commit=False)
+    try:
+        result = job(db)
+        db.commit()
+        return result
+    finally:
+        db.close()
+
+
+async def run_write(job: Job, user_id: Optional[int] = None):
+    """Run `job` and commit it; batched with other writes in SQLite mode.
+
+    `user_id` pins the user to the primary after the commit when a read
+    replica is configured.
+    """
+    if sqlite_mode:
+        return await asyncio.wrap_future(write_queue.submit(job))
+    return await run_in_threadpool(_run_now, job, user_id)
@@ -9,6 +9,7 @@ const API_BASE_URL = import.meta.env.VITE_API_URL || '/api';
 const apiClient = axios.create({
   baseURL: API_BASE_URL,
   timeout: 5000,
+  withCredentials: true,
   headers: {
     'Content-Type': 'application/json',
   },
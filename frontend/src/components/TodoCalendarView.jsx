@@ -1,5 +1,14 @@
-import React, { useMemo } from 'react';
+import React, { useEffect, useState } from 'react';
+import axios from 'axios';
 import { ChevronLeft, ChevronRight, Trash2, Edit2, Loader } from 'lucide-react';
+import { todoKey } from '../utils/todoKey';
+
+// YYYY-MM-DD of a local date, as the API's from/to expect
+const toDateParam = (date) => {
+  const month = String(date.getMonth() + 1).padStart(2, '0');
+  const day = String(date.getDate()).padStart(2, '0');
+  return `${date.getFullYear()}-${month}-${day}`;
+};
 
 export default function TodoCalendarView({
   todos,
@@ -7,21 +16,53 @@ export default function TodoCalendarView({
   onDelete,
   onStatusChange,
   deletingId,
+  apiBaseUrl,
+  userId,
+  token,
 }) {
   const [currentDate, setCurrentDate] = React.useState(new Date());
+  const [monthSummary, setMonthSummary] = useState({});
+  const [monthTodos, setMonthTodos] = useState([]);
+
+  // Per-day counts and top previews for the visible month, aggregated by the
+  // API (/auth/todo/calendar) instead of grouping the whole list here.
+  // Refetched when the month changes or the todo list was reloaded.
+  useEffect(() => {
+    const monthStart = new Date(currentDate.getFullYear(), currentDate.getMonth(), 1);
+    const monthEnd = new Date(currentDate.getFullYear(), currentDate.getMonth() + 1, 0);
+    const range = { from: toDateParam(monthStart), to: toDateParam(monthEnd) };
+    const headers = { 'Authorization': token || '' };
+    let cancelled = false;
+
+    axios
+      .get(`${apiBaseUrl}/auth/todo/calendar`, { params: { ...range, top: 2 }, headers })
+      .then((response) => {
+        if (cancelled) return;
+        const byDate = {};
+        response.data.forEach((day) => {
+          byDate[day.date] = day;
+        });
+        setMonthSummary(byDate);
+      })
+      .catch((err) => {
+        console.error('Error loading calendar:', err);
+      });
 
-  // Group todos by date
-  const todosByDate = useMemo(() => {
-    const grouped = {};
-    todos.forEach((todo) => {
-      const dateKey = todo.date ? new Date(todo.date).toISOString().split('T')[0] : 'no-date';
-      if (!grouped[dateKey]) {
-        grouped[dateKey] = [];
-      }
-      grouped[dateKey].push(todo);
-    });
-    return grouped;
-  }, [todos]);
+    // The month's todos, with recurring ones expanded over this month (the
+    // main list only covers the server's default window around today)
+    axios
+      .get(`${apiBaseUrl}/auth/todo/${userId}`, { params: range, headers })
+      .then((response) => {
+        if (!cancelled) setMonthTodos(response.data);
+      })
+      .catch((err) => {
+        console.error('Error loading todos for the month:', err);
+      });
+
+    return () => {
+      cancelled = true;
+    };
+  }, [currentDate, todos, apiBaseUrl, userId, token]);
 
   // Get days in month
   const getDaysInMonth = (date) => {
@@ -76,10 +117,6 @@ export default function TodoCalendarView({
     setCurrentDate(new Date());
   };
 
-  const formatDate = (date) => {
-    return date.toISOString().split('T')[0];
-  };
-
   const formatDateDisplay = (dateString) => {
     if (!dateString) return 'No date';
     try {
@@ -155,9 +192,9 @@ export default function TodoCalendarView({
                 return <div key={`empty-${index}`} className="h-16 bg-neutral-900/50 rounded" />;
               }
 
-              const dateStr = formatDate(date);
-              const todayStr = formatDate(new Date());
-              const dayTodos = todosByDate[dateStr] || [];
+              const dateStr = toDateParam(date);
+              const todayStr = toDateParam(new Date());
+              const day = monthSummary[dateStr];
               const isToday = dateStr === todayStr;
 
               return (
@@ -172,20 +209,20 @@ export default function TodoCalendarView({
                   <div className="text-xs font-semibold text-neutral-300 mb-1">
                     {date.getDate()}
                   </div>
-                  {dayTodos.length > 0 && (
+                  {day && day.total > 0 && (
                     <div className="space-y-0.5">
-                      {dayTodos.slice(0, 2).map((todo) => (
+                      {day.preview.map((todo, previewIndex) => (
                         <div
-                          key={todo.id}
+                          key={`${todo.id}-${previewIndex}`}
                           className="text-xs truncate px-1 py-0.5 rounded bg-blue-500/20 text-blue-300"
                           title={todo.notes}
                         >
                           {todo.notes}
                         </div>
                       ))}
-                      {dayTodos.length > 2 && (
+                      {day.total > day.preview.length && (
                         <div className="text-xs text-neutral-400 text-center">
-                          +{dayTodos.length - 2}
+                          +{day.total - day.preview.length}
                         </div>
                       )}
                     </div>
@@ -197,19 +234,18 @@ export default function TodoCalendarView({
         </div>
       </div>
 
-      {/* Todos for selected date or upcoming */}
+      {/* Todos in the visible month */}
       <div className="flex-1 overflow-auto">
-        <h4 className="font-semibold text-sm mb-3 text-neutral-200">Upcoming Todos</h4>
+        <h4 className="font-semibold text-sm mb-3 text-neutral-200">Todos in {monthName}</h4>
         <div className="space-y-2">
-          {todos
+          {[...monthTodos]
             .filter((t) => t.date)
             .sort((a, b) => new Date(a.date) - new Date(b.date))
-            .slice(0, 10)
             .map((todo) => {
-              const isDeleting = deletingId === todo.id;
+              const isDeleting = deletingId === todoKey(todo);
               return (
                 <div
-                  key={todo.id}
+                  key={todoKey(todo)}
                   className={`p-3 bg-neutral-800/50 rounded-lg border border-neutral-700 ${
                     isDeleting ? 'opacity-50 bg-red-500/5' : 'hover:bg-neutral-800'
                   } transition-colors`}
@@ -238,7 +274,7 @@ export default function TodoCalendarView({
                         <Edit2 size={14} />
                       </button>
                       <button
-                        onClick={() => onDelete(todo.id)}
+                        onClick={() => onDelete(todo)}
                         disabled={isDeleting}
                         className="p-1 text-neutral-400 hover:text-red-400 rounded transition-colors disabled:opacity-50"
                       >
@@ -1,5 +1,6 @@
 import React from 'react';
 import { CheckCircle2, Circle, AlertCircle, Trash2, Edit2, Loader } from 'lucide-react';
+import { todoKey } from '../utils/todoKey';
 
 const priorityColors = {
   'High': { bg: 'bg-red-500/10', border: 'border-red-500/30', text: 'text-red-300', badge: 'bg-red-500/20 text-red-300' },
@@ -47,11 +48,11 @@ export default function TodoCardView({
         const priority = todo.priority || 'Medium';
         const priorityColor = priorityColors[priority] || priorityColors['Medium'];
         const statusColor = statusColors[todo.status] || statusColors['Pending'];
-        const isDeleting = deletingId === todo.id;
+        const isDeleting = deletingId === todoKey(todo);
 
         return (
           <div
-            key={todo.id}
+            key={todoKey(todo)}
             className={`border rounded-lg p-4 transition-all ${priorityColor.border} ${priorityColor.bg} ${
               isDeleting ? 'opacity-50 bg-red-500/5' : 'hover:shadow-lg hover:shadow-neutral-900'
             }`}
@@ -111,7 +112,7 @@ export default function TodoCardView({
                 <Edit2 size={16} />
               </button>
               <button
-                onClick={() => onDelete(todo.id)}
+                onClick={() => onDelete(todo)}
                 disabled={isDeleting}
                 className="p-1.5 text-neutral-400 hover:text-red-400 hover:bg-neutral-700/50 rounded transition-colors disabled:opacity-50 disabled:cursor-not-allowed"
                 title="Delete"
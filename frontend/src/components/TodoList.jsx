@@ -1,5 +1,6 @@
 import React from 'react';
 import { CheckCircle2, Circle, AlertCircle, Trash2 } from 'lucide-react';
+import { todoKey } from '../utils/todoKey';
 
 const priorityColors = {
   'High': { bg: 'bg-red-500/10', border: 'border-red-500/30', text: 'text-red-300', badge: 'bg-red-500/20 text-red-300' },
@@ -56,7 +57,7 @@ export default function TodoList({ todos }) {
 
           return (
             <div
-              key={todo.id}
+              key={todoKey(todo)}
               className={`p-4 transition-colors hover:bg-neutral-800/50 cursor-pointer border-l-4 ${
                 priority === 'High' ? 'border-l-red-500' :
                 priority === 'Medium' ? 'border-l-amber-500' :
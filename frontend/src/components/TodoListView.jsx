@@ -1,5 +1,6 @@
 import React from 'react';
 import { CheckCircle2, Circle, AlertCircle, Trash2, Edit2, Loader } from 'lucide-react';
+import { todoKey } from '../utils/todoKey';
 
 const priorityColors = {
   'High': { badge: 'bg-red-500/20 text-red-300' },
@@ -50,11 +51,11 @@ export default function TodoListView({
         const priority = todo.priority || 'Medium';
         const priorityColor = priorityColors[priority] || priorityColors['Medium'];
         const statusColor = statusColors[todo.status] || 'text-neutral-400';
-        const isDeleting = deletingId === todo.id;
+        const isDeleting = deletingId === todoKey(todo);
 
         return (
           <div
-            key={todo.id}
+            key={todoKey(todo)}
             className={`p-4 transition-colors border-l-4 group ${
               priority === 'High'
                 ? 'border-l-red-500'
@@ -134,7 +135,7 @@ export default function TodoListView({
                     <Edit2 size={16} />
                   </button>
                   <button
-                    onClick={() => onDelete(todo.id)}
+                    onClick={() => onDelete(todo)}
                     disabled={isDeleting}
                     className="p-2 hover:bg-neutral-700 rounded-lg text-neutral-400 hover:text-red-400 transition-colors disabled:opacity-50 disabled:cursor-not-allowed"
                     title="Delete todo"
@@ -6,6 +6,7 @@ import TodoListView from './TodoListView';
 import TodoCardView from './TodoCardView';
 import TodoCalendarView from './TodoCalendarView';
 import EmptyState from './EmptyState';
+import { todoKey } from '../utils/todoKey';
 import axios from 'axios';
 
 export default function TodoListWithCRUD({ todos, apiBaseUrl, userId, token, onTodosUpdated }) {
@@ -79,10 +80,10 @@ export default function TodoListWithCRUD({ todos, apiBaseUrl, userId, token, onT
 
   const handleUpdateTodo = (formData) => {
     if (!editingTodo) return;
-    handleSubmitTodo(formData, editingTodo.id);
+    handleSubmitTodo(formData, editingTodo.id, editingTodo.occurrence_date);
   };
 
-  const handleSubmitTodo = async (formData, todoId = null) => {
+  const handleSubmitTodo = async (formData, todoId = null, occurrenceDate = null) => {
     console.log('handleSubmitTodo called with:', { formData, todoId, isEdit: !!todoId });
 
     if (!userId || !token || !apiBaseUrl) {
@@ -100,12 +101,20 @@ export default function TodoListWithCRUD({ todos, apiBaseUrl, userId, token, onT
 
       const method = todoId ? 'PATCH' : 'POST';
 
-      const data = {
-        ...formData,
-        date: formData.date instanceof Date
-          ? formData.date.toISOString()
-          : new Date(formData.date).toISOString(),
-      };
+      // One occurrence of a recurring todo keeps its date; only this occurrence changes
+      const data = occurrenceDate
+        ? {
+            notes: formData.notes,
+            status: formData.status,
+            priority: formData.priority,
+            occurrence_date: occurrenceDate,
+          }
+        : {
+            ...formData,
+            date: formData.date instanceof Date
+              ? formData.date.toISOString()
+              : new Date(formData.date).toISOString(),
+          };
 
       console.log('Sending request:', { method, url, data });
 
@@ -143,7 +152,8 @@ export default function TodoListWithCRUD({ todos, apiBaseUrl, userId, token, onT
     }
   };
 
-  const handleDeleteTodo = async (todoId) => {
+  const handleDeleteTodo = async (todo) => {
+    const todoId = todo?.id;
     console.log('Delete button clicked, todoId:', todoId, 'type:', typeof todoId);
 
     if (!todoId) {
@@ -151,7 +161,11 @@ export default function TodoListWithCRUD({ todos, apiBaseUrl, userId, token, onT
       return;
     }
 
-    if (!window.confirm('Are you sure you want to delete this todo?')) {
+    // Deleting an occurrence of a recurring todo skips just that day
+    const confirmMessage = todo.occurrence_date
+      ? `Skip this repeating todo on ${todo.occurrence_date}?`
+      : 'Are you sure you want to delete this todo?';
+    if (!window.confirm(confirmMessage)) {
       return;
     }
 
@@ -160,11 +174,13 @@ export default function TodoListWithCRUD({ todos, apiBaseUrl, userId, token, onT
       return;
     }
 
-    setDeletingId(todoId);
+    setDeletingId(todoKey(todo));
     setError(null);
 
     try {
-      const deleteUrl = `${apiBaseUrl}/auth/todo/${todoId}`;
+      const deleteUrl = todo.occurrence_date
+        ? `${apiBaseUrl}/auth/todo/${todoId}?occurrence_date=${todo.occurrence_date}`
+        : `${apiBaseUrl}/auth/todo/${todoId}`;
       console.log('DELETE request URL:', deleteUrl);
 
       await axios.delete(deleteUrl, {
@@ -201,7 +217,9 @@ export default function TodoListWithCRUD({ todos, apiBaseUrl, userId, token, onT
     try {
       await axios.patch(
         `${apiBaseUrl}/auth/todo/${todo.id}`,
-        { status: newStatus },
+        todo.occurrence_date
+          ? { status: newStatus, occurrence_date: todo.occurrence_date }
+          : { status: newStatus },
         {
           headers: {
             'Content-Type': 'application/json',
@@ -241,7 +259,7 @@ export default function TodoListWithCRUD({ todos, apiBaseUrl, userId, token, onT
       case 'card':
         return <TodoCardView {...viewProps} />;
       case 'calendar':
-        return <TodoCalendarView {...viewProps} />;
+        return <TodoCalendarView {...viewProps} apiBaseUrl={apiBaseUrl} userId={userId} token={token} />;
       case 'list':
       default:
         return <TodoListView {...viewProps} />;
@@ -1,9 +1,14 @@
 import { StrictMode } from 'react'
 import { createRoot } from 'react-dom/client'
+import axios from 'axios'
 import './index.css'
 import App from './App.jsx'
 import { AuthProvider } from './context/AuthContext'
 
+// Send the API's read-your-writes cookie back so a read right after a
+// write is served from the primary database
+axios.defaults.withCredentials = true
+
 createRoot(document.getElementById('root')).render(
   <StrictMode>
     <AuthProvider>
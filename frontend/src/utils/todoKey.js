@@ -0,0 +1,10 @@
+/**
+ * Stable React key / identity for a todo in a list.
+ * Occurrences of a recurring todo share the series id, so they are told
+ * apart by their occurrence_date.
+ * @param {object} todo
+ * @returns {string}
+ */
+export function todoKey(todo) {
+  return todo.occurrence_date ? `${todo.id}:${todo.occurrence_date}` : String(todo.id);
+}